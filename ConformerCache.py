@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 15:31:44 2026
+
+@author: alfonsocabezonvizoso
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+import numpy as np
+
+
+def cache_key(canonical_smiles : str, **params):
+    '''
+    Content address of a conformer: SHA-256 of the canonical SMILES and the
+    embedding / force-field parameters, serialized with sorted keys.
+    '''
+    payload = json.dumps({'smiles': canonical_smiles, **params}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ConformerCache:
+    '''
+    On-disk, size-bounded LRU store of conformers and molecular graphs.
+
+    Every entry is one small ``.npz`` file named after its key and placed in
+    a two-character fan-out directory. Entries are written to a temporary
+    file in the same directory and moved into place with ``os.replace``, so
+    concurrent writers never expose partial files and the last writer of a
+    key simply wins. A hit refreshes the file's modification time, and
+    eviction removes the least recently used files once the store exceeds
+    ``max_bytes``.
+
+    Parameters
+    ----------
+    root : str
+        Cache directory. Created if needed.
+    max_bytes : int, optional
+        Size budget of the cache. The default is 1 GB.
+
+    '''
+
+    def __init__(self, root : str, max_bytes : int = 2**30):
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        os.makedirs(root, exist_ok=True)
+        # Total size is only measured when this instance first writes, and
+        # re-measured after it has written another 5% of the budget
+        self._size = None
+        self._written = 0
+
+    def _path(self, key : str):
+        return os.path.join(self.root, key[:2], f'{key}.npz')
+
+    def _scan(self):
+        '''
+        List (mtime, size, path) of all entries and their total size.
+        '''
+        entries = []
+        for sub in os.scandir(self.root):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if not entry.name.endswith('.npz'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries, sum(e[1] for e in entries)
+
+    def get(self, key : str):
+        '''
+        Arrays stored under ``key``, or None on a miss.
+        '''
+        path = self._path(key)
+        try:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+            os.utime(path)
+        except (FileNotFoundError, OSError, ValueError, zipfile.BadZipFile):
+            return None
+        return arrays
+
+    def put(self, key : str, **arrays):
+        '''
+        Store ``arrays`` under ``key`` atomically and evict if over budget.
+        '''
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                np.savez(handle, **arrays)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        size = os.path.getsize(path)
+        self._written += size
+        if self._size is None or self._written > 0.05 * self.max_bytes:
+            self._size = self._scan()[1]
+            self._written = 0
+        else:
+            self._size += size
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        '''
+        Remove least recently used entries until the cache fits in 90% of
+        ``max_bytes``. Entries removed concurrently by other processes are
+        ignored.
+        '''
+        entries, total = self._scan()
+        entries.sort()
+        target = 0.9 * self.max_bytes
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._size = total
+
+    def __contains__(self, key : str):
+        return os.path.exists(self._path(key))
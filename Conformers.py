@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:48:10 2026
+
+@author: alfonsocabezonvizoso
+"""
+
+import collections
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from rdkit import Chem
+from rdkit.Chem import AllChem
+from ConformerCache import ConformerCache, cache_key
+from XYZTrajectory import format_xyz
+
+
+def embed_smiles(smi : str, random_seed : int = 0, add_hs : bool = True,
+                 etkdg : str = 'ETKDG', cache=None):
+    '''
+    Build a UFF-optimized 3D conformer from a SMILES string with ETKDG.
+
+    Parameters
+    ----------
+    smi : str
+        SMILE string of a molecule.
+    random_seed : int, optional
+        Seed of the ETKDG embedding. The default is 0.
+    add_hs : bool, optional
+        Add explicit hydrogens before embedding. The default is True.
+    etkdg : str, optional
+        ETKDG variant of rdkit.Chem.AllChem, e.g. 'ETKDGv3'. The default is
+        'ETKDG'.
+    cache : ConformerCache or str, optional
+        Conformer cache (or its directory). On a hit the stored coordinates
+        are used instead of embedding; on a miss the new conformer is stored.
+
+    Returns
+    -------
+    mol : rdkit.Chem.Mol
+        Molecule with one conformer.
+
+    '''
+    mol = Chem.MolFromSmiles(smi)
+    if mol is None:
+        raise ValueError(f'Invalid SMILES: {smi}')
+    canonical = Chem.MolToSmiles(mol)
+    if add_hs:
+        mol = Chem.AddHs(mol)
+
+    if cache is not None:
+        if isinstance(cache, str):
+            cache = ConformerCache(cache)
+        key = cache_key(canonical, random_seed=random_seed, add_hs=add_hs,
+                        etkdg=etkdg, forcefield='UFF')
+        # Entries are stored in canonical atom order so that any SMILES of
+        # the same molecule maps onto them
+        ranks = np.array(Chem.CanonicalRankAtoms(mol))
+        hit = cache.get(key)
+        if hit is not None and len(hit['coords']) == mol.GetNumAtoms():
+            conf = Chem.Conformer(mol.GetNumAtoms())
+            conf.SetPositions(hit['coords'][ranks].astype(float))
+            mol.AddConformer(conf, assignId=True)
+            return mol
+
+    params = getattr(AllChem, etkdg)()
+    params.randomSeed = random_seed
+    if AllChem.EmbedMolecule(mol, params) != 0:
+        raise RuntimeError(f'Embedding failed for {smi}')
+    AllChem.UFFOptimizeMolecule(mol)
+
+    if cache is not None:
+        coords = np.empty((mol.GetNumAtoms(), 3), dtype=np.float32)
+        coords[ranks] = mol.GetConformer().GetPositions()
+        atomic_numbers = np.empty(mol.GetNumAtoms(), dtype=np.uint8)
+        atomic_numbers[ranks] = [atom.GetAtomicNum() for atom in mol.GetAtoms()]
+        bonds = mol.GetBonds()
+        edge_index = np.array([[ranks[b.GetBeginAtomIdx()] for b in bonds],
+                               [ranks[b.GetEndAtomIdx()] for b in bonds]],
+                              dtype=np.int32).reshape(2, -1)
+        bond_order = np.array([b.GetBondTypeAsDouble() for b in bonds], dtype=np.float32)
+        cache.put(key, coords=coords, atomic_numbers=atomic_numbers,
+                  edge_index=edge_index, bond_order=bond_order)
+    return mol
+
+
+def read_smiles(source):
+    '''
+    Yield SMILES strings from a file path, an open file or '-' for stdin.
+    Only the first whitespace-separated field of every line is used; blank
+    lines and lines starting with '#' are skipped.
+    '''
+    if source == '-':
+        handle = sys.stdin
+    elif isinstance(source, str):
+        handle = open(source)
+    else:
+        handle = source
+    try:
+        for line in handle:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line.split()[0]
+    finally:
+        if handle is not sys.stdin and handle is not source:
+            handle.close()
+
+
+_worker_caches = {}
+
+
+def _embed_chunk(chunk, params : dict):
+    '''
+    Worker: embed a list of (index, smiles) pairs. Failures are returned as
+    records with an error message instead of being raised. A cache given by
+    its directory is opened once per process.
+    '''
+    if isinstance(params['cache'], str):
+        root = params['cache']
+        if root not in _worker_caches:
+            _worker_caches[root] = ConformerCache(root)
+        params = dict(params, cache=_worker_caches[root])
+    results = []
+    for index, smi in chunk:
+        try:
+            mol = embed_smiles(smi, **params)
+            elements = [atom.GetSymbol() for atom in mol.GetAtoms()]
+            coords = mol.GetConformer().GetPositions().astype(np.float32)
+            results.append((index, smi, elements, coords, None))
+        except Exception as error:
+            results.append((index, smi, None, None, f'{type(error).__name__}: {error}'))
+    return results
+
+
+def _chunks(smiles, chunk_size : int):
+    chunk = []
+    for index, smi in enumerate(smiles):
+        chunk.append((index, smi))
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def embed_batch(smiles, n_jobs : int = None, chunk_size : int = 64,
+                random_seed : int = 0, add_hs : bool = True, etkdg : str = 'ETKDG',
+                cache : str = None):
+    '''
+    Embed many SMILES over a process pool, yielding results in input order.
+
+    Work is sent to the workers in chunks of ``chunk_size`` molecules and at
+    most a few chunks per worker are in flight, so memory stays bounded for
+    arbitrarily long inputs.
+
+    Parameters
+    ----------
+    smiles : iterable of str
+        SMILES strings.
+    n_jobs : int, optional
+        Number of worker processes. The default is os.cpu_count(). With
+        n_jobs=1 everything runs in the calling process.
+    chunk_size : int, optional
+        Molecules per work unit. The default is 64.
+    random_seed : int, optional
+        Seed of the ETKDG embedding. The default is 0.
+    add_hs : bool, optional
+        Add explicit hydrogens before embedding. The default is True.
+    etkdg : str, optional
+        ETKDG variant, see ``embed_smiles``. The default is 'ETKDG'.
+    cache : str, optional
+        Directory of a ConformerCache shared by all workers.
+
+    Yields
+    ------
+    tuple
+        (index, smiles, elements, coords, error) for every input molecule.
+        ``elements`` and ``coords`` are None and ``error`` holds the message
+        when the molecule failed.
+
+    '''
+    n_jobs = n_jobs or os.cpu_count()
+    params = dict(random_seed=random_seed, add_hs=add_hs, etkdg=etkdg, cache=cache)
+    chunks = _chunks(smiles, chunk_size)
+    if n_jobs == 1:
+        for chunk in chunks:
+            yield from _embed_chunk(chunk, params)
+        return
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_embed_chunk, chunk, params))
+            if len(pending) >= 4 * n_jobs:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def run_batch(source, output : str, n_jobs : int = None, chunk_size : int = 64,
+              random_seed : int = 0, add_hs : bool = True, etkdg : str = 'ETKDG',
+              cache : str = None):
+    '''
+    Embed every SMILES of ``source`` and write the conformers to ``output``.
+
+    If ``output`` ends in '.npz' the conformers are stored compactly as
+    concatenated float32 coordinates, uint8 atomic numbers and per-molecule
+    atom offsets; otherwise one multi-frame XYZ file is written, with the
+    input index and SMILES as comment line. Failed molecules are skipped in
+    the output and listed in ``<output>.failures.tsv``. The remaining
+    arguments are passed to ``embed_batch``.
+
+    Returns
+    -------
+    n_ok : int
+        Number of embedded molecules.
+    n_failed : int
+        Number of failures.
+
+    '''
+    to_npz = output.endswith('.npz')
+    coords_all, numbers_all, n_atoms, indices, smiles_ok = [], [], [], [], []
+    periodic = Chem.GetPeriodicTable()
+    n_ok = n_failed = 0
+    with open(f'{output}.failures.tsv', 'w') as failures, \
+         (open(os.devnull, 'wb') if to_npz else open(output, 'wb')) as xyz:
+        failures.write('index\tsmiles\terror\n')
+        for index, smi, elements, coords, error in embed_batch(
+                read_smiles(source), n_jobs=n_jobs, chunk_size=chunk_size,
+                random_seed=random_seed, add_hs=add_hs, etkdg=etkdg, cache=cache):
+            if error is not None:
+                failures.write(f'{index}\t{smi}\t{error}\n')
+                n_failed += 1
+                continue
+            n_ok += 1
+            if to_npz:
+                coords_all.append(coords)
+                numbers_all.append(np.array([periodic.GetAtomicNumber(e) for e in elements],
+                                            dtype=np.uint8))
+                n_atoms.append(len(elements))
+                indices.append(index)
+                smiles_ok.append(smi)
+            else:
+                xyz.write(format_xyz(coords, elements, f'{index} {smi}'))
+    if to_npz:
+        offsets = np.zeros(len(n_atoms) + 1, dtype=np.int64)
+        np.cumsum(n_atoms, out=offsets[1:])
+        np.savez(output,
+                 coords=np.concatenate(coords_all) if coords_all else np.empty((0, 3), np.float32),
+                 atomic_numbers=np.concatenate(numbers_all) if numbers_all else np.empty(0, np.uint8),
+                 offsets=offsets, index=np.array(indices, dtype=np.int64),
+                 smiles=np.array(smiles_ok))
+    return n_ok, n_failed
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:41:06 2026
+
+@author: alfonsocabezonvizoso
+"""
+
+import numpy as np
+from matplotlib.colors import LinearSegmentedColormap, to_rgb
+
+# Above this many points the demos draw densities instead of markers
+DENSITY_THRESHOLD = 100000
+
+
+def _extent(x, y, extent):
+    if extent is None:
+        extent = (np.min(x), np.max(x), np.min(y), np.max(y))
+    xmin, xmax, ymin, ymax = extent
+    # Degenerate ranges would give empty bins
+    if xmax <= xmin:
+        xmin, xmax = xmin - 0.5, xmax + 0.5
+    if ymax <= ymin:
+        ymin, ymax = ymin - 0.5, ymax + 0.5
+    return xmin, xmax, ymin, ymax
+
+
+def _counts(x, y, bins, extent):
+    counts, _, _ = np.histogram2d(x, y, bins=bins, range=[extent[:2], extent[2:]])
+    # histogram2d returns (x, y); images are indexed (row=y, column=x)
+    return counts.T
+
+
+def _opacity(total, alpha : float):
+    '''
+    Opacity of every bin: 0 when empty, rising with the square root of the
+    count from a floor that keeps single points visible up to ``alpha`` for
+    the fullest bin.
+    '''
+    top = total.max()
+    if top == 0:
+        return np.zeros_like(total)
+    opacity = alpha * (0.15 + 0.85 * np.sqrt(total / top))
+    opacity[total == 0] = 0
+    return opacity
+
+
+def density_scatter(ax, x, y, color='black', label=None, bins : int = 400,
+                    kind : str = 'hist', extent=None, alpha : float = 1.0,
+                    zorder : float = 1):
+    """
+    Draws a point cloud as a raster density image in one color, so the
+    figure size and render time do not depend on the number of points.
+
+    Parameters:
+    - x, y: point coordinates.
+    - color: color of the points; the opacity of every bin grows with the
+      square root of its count.
+    - label: legend entry, drawn as a marker of that color.
+    - bins: bins along each axis ('hist') or hexagons along x ('hexbin').
+    - kind: 'hist' for a 2D histogram image or 'hexbin'.
+    - extent: (xmin, xmax, ymin, ymax) of the binned region, the data range
+      by default.
+    - alpha: opacity of the densest bin.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    extent = _extent(x, y, extent)
+    rgb = to_rgb(color)
+    if kind == 'hexbin':
+        cmap = LinearSegmentedColormap.from_list('density', [(*rgb, 0.15 * alpha), (*rgb, alpha)])
+        artist = ax.hexbin(x, y, gridsize=bins, extent=extent, bins='log', mincnt=1,
+                           cmap=cmap, linewidths=0, zorder=zorder, rasterized=True)
+    elif kind == 'hist':
+        image = np.zeros((bins, bins, 4))
+        image[..., :3] = rgb
+        image[..., 3] = _opacity(_counts(x, y, bins, extent), alpha)
+        artist = ax.imshow(image, origin='lower', extent=extent, aspect='auto',
+                           interpolation='nearest', zorder=zorder)
+    else:
+        raise ValueError(f"Unknown kind {kind!r}, use 'hist' or 'hexbin'")
+    if label is not None:
+        ax.scatter([], [], color=color, label=label)
+    return artist
+
+
+def cluster_density(ax, x, y, labels, colors : dict, bins : int = 400, extent=None,
+                    alpha : float = 1.0, zorder : float = 1, legend : bool = True):
+    """
+    Draws clustered points as one raster image with a color channel per
+    cluster: every bin gets the count-weighted mix of the colors of the
+    clusters falling in it and an opacity rising with the total count.
+
+    Parameters:
+    - x, y: point coordinates.
+    - labels: cluster label of every point. Labels missing from `colors`
+      (e.g. noise, -1) are not drawn.
+    - colors: {label: color}.
+    - bins: bins along each axis.
+    - extent: (xmin, xmax, ymin, ymax) of the binned region, the data range
+      by default.
+    - alpha: opacity of the densest bin.
+    - legend: add a 'Cluster <label>' legend entry per cluster.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    labels = np.asarray(labels)
+    extent = _extent(x, y, extent)
+    rgb = np.zeros((bins, bins, 3))
+    total = np.zeros((bins, bins))
+    for lbl, color in colors.items():
+        mask = labels == lbl
+        counts = _counts(x[mask], y[mask], bins, extent)
+        rgb += counts[..., None] * np.asarray(to_rgb(color))
+        total += counts
+        if legend:
+            ax.scatter([], [], color=color, label=f'Cluster {lbl}')
+    image = np.zeros((bins, bins, 4))
+    filled = total > 0
+    image[filled, :3] = rgb[filled] / total[filled, None]
+    image[..., 3] = _opacity(total, alpha)
+    return ax.imshow(image, origin='lower', extent=extent, aspect='auto',
+                     interpolation='nearest', zorder=zorder)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:14:52 2026
+
+@author: alfonsocabezonvizoso
+"""
+
+import argparse
+import itertools
+import os
+import numpy as np
+from StreamingPCA import StreamingPCA, batch_stats, iter_batches, map_batches
+
+
+def kabsch_align(frames, reference, weights=None):
+    '''
+    Superpose a batch of frames onto a reference with the Kabsch algorithm.
+
+    All frames are handled at once: the 3x3 correlation matrices are built
+    with one einsum and decomposed with one batched SVD, so there is no
+    Python loop over frames.
+
+    Parameters
+    ----------
+    frames : np.ndarray
+        Coordinates, shape (n_frames, n_atoms, 3).
+    reference : np.ndarray
+        Reference coordinates, shape (n_atoms, 3).
+    weights : np.ndarray, optional
+        Per-atom weights (e.g. masses) of the fit. The default is uniform.
+
+    Returns
+    -------
+    aligned : np.ndarray
+        Superposed frames, shape (n_frames, n_atoms, 3), centered on the
+        reference's weighted center.
+    rmsd : np.ndarray
+        Weighted RMSD of every frame after superposition.
+
+    '''
+    frames = np.asarray(frames, dtype=float)
+    reference = np.asarray(reference, dtype=float)
+    if frames.shape[1:] != reference.shape:
+        raise ValueError(f'Frames of shape {frames.shape[1:]} do not match the reference {reference.shape}')
+    if weights is None:
+        w = np.full(reference.shape[0], 1 / reference.shape[0])
+    else:
+        w = np.asarray(weights, dtype=float)
+        w = w / w.sum()
+    ref_center = w @ reference
+    ref = reference - ref_center
+    centered = frames - np.einsum('n,bni->bi', w, frames)[:, None, :]
+    # Correlation matrices H = X^T W Y and their SVD, one per frame
+    H = np.einsum('bni,n,nj->bij', centered, w, ref)
+    U, _, Vt = np.linalg.svd(H)
+    # Reflections are turned into proper rotations
+    d = np.sign(np.linalg.det(U @ Vt))
+    U[:, :, 2] *= d[:, None]
+    rotation = U @ Vt
+    aligned = centered @ rotation
+    diff = aligned - ref
+    rmsd = np.sqrt(np.einsum('n,bni,bni->b', w, diff, diff))
+    return aligned + ref_center, rmsd
+
+
+def _frames(batch, n_atoms : int):
+    return np.asarray(batch).reshape(len(batch), n_atoms, 3)
+
+
+def _align_stats(batch, reference, weights, dtype):
+    aligned, rmsd = kabsch_align(_frames(batch, len(reference)), reference, weights)
+    return batch_stats(aligned, dtype), rmsd
+
+
+def _align_project(batch, reference, weights, mean, components):
+    aligned, _ = kabsch_align(_frames(batch, len(reference)), reference, weights)
+    return (aligned.reshape(len(aligned), -1) - mean) @ components.T
+
+
+def essential_dynamics(source, reference=None, n_components : int = 10, weights=None,
+                       batch_size : int = 1000, n_jobs : int = 1, dtype=np.float64,
+                       project : bool = True):
+    '''
+    Coordinate PCA (essential dynamics) of a trajectory: every frame is
+    superposed on a reference with ``kabsch_align`` and the aligned
+    coordinates are fed batch by batch to a ``StreamingPCA``.
+
+    The trajectory is read in batches (see ``StreamingPCA.iter_batches``),
+    once to fit and once more to project, so memory is bounded by the batch
+    size. Alignment and batch statistics run over ``n_jobs`` processes.
+
+    Parameters
+    ----------
+    source : str, np.ndarray or iterable
+        Trajectory, (n_frames, n_atoms, 3) frames as accepted by
+        ``iter_batches``. Generators can only be read once, so use
+        project=False and a reference other than 'mean', or a file / array,
+        for them.
+    reference : np.ndarray or str, optional
+        Reference structure (n_atoms, 3). 'mean' aligns to the first frame,
+        then to the average aligned structure, at the cost of one more pass.
+        The default is the first frame.
+    n_components : int, optional
+        Number of modes kept. The default is 10.
+    weights : np.ndarray, optional
+        Per-atom fit weights, e.g. masses. The default is uniform.
+    batch_size : int, optional
+        Frames per batch. The default is 1000.
+    n_jobs : int, optional
+        Worker processes (None means os.cpu_count()). The default is 1.
+    dtype : np.dtype, optional
+        Accumulation precision of the PCA. The default is np.float64.
+    project : bool, optional
+        Project the trajectory on the modes. The default is True.
+
+    Returns
+    -------
+    dict
+        ``pca`` (the fitted StreamingPCA), ``reference``, ``eigenvalues``
+        (n_components,), ``projections`` (n_frames, n_components) or None,
+        ``rmsd`` of every frame to the reference, ``rmsf`` (n_atoms,) and
+        ``rmsf_modes`` (n_components, n_atoms), the fluctuation of every
+        atom carried by each mode.
+
+    '''
+    n_jobs = n_jobs or os.cpu_count()
+    if (isinstance(reference, str) and reference == 'mean'
+            and not isinstance(source, (str, np.ndarray)) and iter(source) is source):
+        raise TypeError("reference='mean' reads the trajectory twice, "
+                        "use a file or an array instead of a one-shot iterable")
+    batches = iter_batches(source, batch_size)
+    if reference is None or isinstance(reference, str):
+        first = next(batches)
+        start = first[0].reshape(-1, 3)
+        # The peeked batch goes back in front, so one-shot iterables lose nothing
+        batches = itertools.chain([first], batches)
+        if reference == 'mean':
+            mean = StreamingPCA(dtype=dtype)
+            for stats, _ in map_batches(_align_stats, batches, n_jobs, start, weights, dtype):
+                mean.merge(*stats)
+            reference = mean.mean_.reshape(-1, 3)
+            batches = iter_batches(source, batch_size)
+        else:
+            reference = start
+    reference = np.asarray(reference, dtype=float)
+    n_atoms = len(reference)
+
+    pca = StreamingPCA(n_components, dtype=dtype)
+    rmsd = []
+    for stats, batch_rmsd in map_batches(_align_stats, batches,
+                                         n_jobs, reference, weights, dtype):
+        pca.merge(*stats)
+        rmsd.append(batch_rmsd)
+    pca.finalize()
+
+    projections = None
+    if project:
+        projections = np.concatenate(list(map_batches(
+            _align_project, iter_batches(source, batch_size), n_jobs,
+            reference, weights, pca.mean_, pca.components_)))
+
+    # Each mode moves atom i by sqrt(eigenvalue) * |v_i| (root mean square)
+    modes = pca.components_.reshape(len(pca.components_), n_atoms, 3)
+    rmsf_modes = np.sqrt(pca.explained_variance_[:, None] * np.sum(modes ** 2, axis=2))
+    rmsf = np.sqrt(pca.feature_variance_.reshape(n_atoms, 3).sum(axis=1))
+    return {'pca': pca, 'reference': reference, 'eigenvalues': pca.explained_variance_,
+            'projections': projections, 'rmsd': np.concatenate(rmsd),
+            'rmsf': rmsf, 'rmsf_modes': rmsf_modes}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Essential dynamics: aligned coordinate PCA of a trajectory')
+    parser.add_argument('-i', '--input', help='Trajectory (multi-frame .xyz or .npy of shape (n_frames, n_atoms, 3))',
+                        action='store', type = str, required=True)
+    parser.add_argument('-o', '--output', help='Results (.npz)',
+                        action='store', type = str, default='essential_dynamics.npz')
+    parser.add_argument('-n', '--n_components', help='Number of modes',
+                        action='store', type = int, default=10)
+    parser.add_argument('-r', '--reference', help='"first", "mean" or a .npy/.xyz file with the reference structure',
+                        action='store', type = str, default='first')
+    parser.add_argument('-b', '--batch_size', help='Frames per batch',
+                        action='store', type = int, default=1000)
+    parser.add_argument('-j', '--n_jobs', help='Worker processes',
+                        action='store', type = int, default=1)
+    parser.add_argument('--float32', help='Accumulate the covariance in single precision',
+                        action='store_true')
+    args = parser.parse_args()
+
+    reference = None
+    if args.reference == 'mean':
+        reference = 'mean'
+    elif args.reference.endswith('.npy'):
+        # One (n_atoms, 3) structure, or the first frame of a trajectory
+        reference = np.load(args.reference)
+        reference = (reference if reference.ndim == 2 else reference[0]).reshape(-1, 3)
+    elif args.reference != 'first':
+        reference = next(iter_batches(args.reference, 1))[0].reshape(-1, 3)
+    result = essential_dynamics(args.input, reference=reference, n_components=args.n_components,
+                                batch_size=args.batch_size, n_jobs=args.n_jobs,
+                                dtype=np.float32 if args.float32 else np.float64)
+    result['pca'].save(f'{os.path.splitext(args.output)[0]}.pca.npz')
+    np.savez(args.output, **{k: v for k, v in result.items() if k != 'pca'})
+    print(f'Eigenvalues: {np.round(result["eigenvalues"], 4)}')
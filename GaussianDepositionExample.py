@@ -60,7 +60,8 @@ Created on Mon Jul 28 18:06:26 2025
 import numpy as np
 import matplotlib.pyplot as plt
 plt.rcParams['font.family'] = 'Times New Roman'
-from matplotlib import cm
+from matplotlib.collections import LineCollection
+from MetadynamicsBias import GridBias, deposit_snapshots
 
 # --- 1) Define an asymmetric double‑well ---
 def V_base(x):
@@ -72,6 +73,9 @@ x       = np.linspace(-3, 3, 1000)
 n_steps = 10
 gamma   = 0.1    # bump height
 sigma   = 0.3     # bump width
+biasfactor = None # e.g. 10 for well-tempered deposition (hills shrink as V grows)
+kT      = 1.0     # thermal energy, only used in well-tempered mode
+snapshot_stride = 1  # draw Vₙ(x) every this many hills
 
 # --- 3) Toy “trajectory” crossing the barrier ---
 np.random.seed(0)
@@ -82,21 +86,22 @@ walk_mid2   = np.random.normal( 0.5, 0.05, 0)
 walk_right  = np.random.normal( 1.0, 0.01, 5)
 cv_positions = np.hstack([walk_left, walk_mid1, walk_center, walk_mid2, walk_right])
 
-# --- 4) Colormap for each step ---
-colors = cm.plasma(np.linspace(0, 1, len(cv_positions)))
+# --- 4) Accumulate Gaussians on the bias grid, keeping every stride-th Vₙ(x) ---
+V0 = V_base(x)
+bias = GridBias(x[0], x[-1], len(x), sigma, biasfactor=biasfactor, kT=kT)
+snapshots = V0 + deposit_snapshots(bias, cv_positions, gamma, stride=snapshot_stride)
 
 # --- 5) Plot the buildup ---
 plt.figure(figsize=(8, 5))
 
 # base potential in thick black
-V0 = V_base(x)
 plt.plot(x, V0, 'k', lw=3, label='Base potential')
 
-# accumulate Gaussians & overplot each Vₙ(x)
-V_acc = V0.copy()
-for pos, col in zip(cv_positions, colors):
-    V_acc += gamma * np.exp(-0.5 * ((x - pos) / sigma) ** 2)
-    plt.plot(x, V_acc, color=col, lw=1.2)
+# all snapshots as one LineCollection, coloured along the plasma colormap
+segments = np.stack(np.broadcast_arrays(x, snapshots), axis=-1)
+buildup = LineCollection(segments, cmap='plasma', lw=1.2, zorder=2)
+buildup.set_array(np.linspace(0, 1, len(snapshots)))
+plt.gca().add_collection(buildup)
 
 # Cosmetics
 plt.xlim(-1.8, 1.8)
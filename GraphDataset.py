@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:58:03 2026
+
+@author: alfonsocabezonvizoso
+"""
+
+import argparse
+import json
+import os
+import numpy as np
+from MolGraph import mol_to_graph
+
+# One-hot atom types; anything else goes to the last column
+ATOM_TYPES = [1, 6, 7, 8, 9, 15, 16, 17, 35, 53]
+N_NODE_FEATURES = len(ATOM_TYPES) + 1 + 2   # one-hot + other + aromatic + charge
+
+_type_column = np.full(256, len(ATOM_TYPES), dtype=np.intp)
+_type_column[ATOM_TYPES] = np.arange(len(ATOM_TYPES))
+
+_FILES = {'x': (np.float32, N_NODE_FEATURES),
+          'edge_index': (np.int32, 2),
+          'edge_attr': (np.float32, 1)}
+
+
+def node_features(graph : dict):
+    '''
+    Node feature matrix of a graph from ``MolGraph.mol_to_graph``: atom-type
+    one-hot, aromatic flag and formal charge, float32 (n_atoms, F).
+    '''
+    n = len(graph['atomic_numbers'])
+    x = np.zeros((n, N_NODE_FEATURES), dtype=np.float32)
+    x[np.arange(n), _type_column[graph['atomic_numbers']]] = 1
+    x[:, -2] = graph['aromatic']
+    x[:, -1] = graph['formal_charge']
+    return x
+
+
+def write_graph_dataset(root : str, graphs, flush_every : int = 4096):
+    '''
+    Featurize many molecular graphs into a disjoint-union dataset on disk.
+
+    All graphs are concatenated: node features go to ``x.bin``, edges (both
+    directions, global node indices) to ``edge_index.bin`` and bond orders to
+    ``edge_attr.bin``. ``node_ptr.npy`` and ``edge_ptr.npy`` hold the
+    per-graph offsets and ``meta.json`` the shapes, so ``GraphDataset`` can
+    memory-map everything. Data is appended to the files every
+    ``flush_every`` graphs, so memory does not grow with the dataset.
+
+    Parameters
+    ----------
+    root : str
+        Output directory.
+    graphs : iterable
+        Dicts from ``MolGraph.mol_to_graph`` or RDKit Mols.
+
+    Returns
+    -------
+    int
+        Number of graphs written.
+
+    '''
+    os.makedirs(root, exist_ok=True)
+    handles = {name: open(os.path.join(root, f'{name}.bin'), 'wb') for name in _FILES}
+    node_counts, edge_counts = [], []
+    n_nodes = 0
+    buffers = {name: [] for name in _FILES}
+
+    def flush():
+        for name, parts in buffers.items():
+            if parts:
+                np.concatenate(parts).tofile(handles[name])
+                parts.clear()
+
+    try:
+        for k, graph in enumerate(graphs):
+            if not isinstance(graph, dict):
+                graph = mol_to_graph(graph)
+            edges = graph['edge_index'].T.astype(np.int32) + n_nodes
+            buffers['x'].append(node_features(graph))
+            buffers['edge_index'].append(np.concatenate([edges, edges[:, ::-1]]))
+            buffers['edge_attr'].append(np.tile(graph['bond_order'], 2)[:, None])
+            node_counts.append(len(graph['atomic_numbers']))
+            edge_counts.append(2 * len(edges))
+            n_nodes += node_counts[-1]
+            if (k + 1) % flush_every == 0:
+                flush()
+        flush()
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+    node_ptr = np.zeros(len(node_counts) + 1, dtype=np.int64)
+    edge_ptr = np.zeros(len(edge_counts) + 1, dtype=np.int64)
+    np.cumsum(node_counts, out=node_ptr[1:])
+    np.cumsum(edge_counts, out=edge_ptr[1:])
+    np.save(os.path.join(root, 'node_ptr.npy'), node_ptr)
+    np.save(os.path.join(root, 'edge_ptr.npy'), edge_ptr)
+    with open(os.path.join(root, 'meta.json'), 'w') as handle:
+        json.dump({'n_graphs': len(node_counts), 'n_nodes': int(node_ptr[-1]),
+                   'n_edges': int(edge_ptr[-1]), 'atom_types': ATOM_TYPES,
+                   'n_node_features': N_NODE_FEATURES}, handle, indent=2)
+    return len(node_counts)
+
+
+class GraphDataset:
+    '''
+    Memory-mapped disjoint-union graph dataset written by
+    ``write_graph_dataset``.
+
+    Batches of consecutive graphs are returned as views into the mapped
+    files (only the edge indices are shifted to start at zero), so an epoch
+    over contiguous batches reads features without copying them.
+
+    Attributes
+    ----------
+    x : np.memmap
+        Node features, float32 (n_nodes, F).
+    edge_index : np.memmap
+        Directed edges with global node indices, int32 (n_edges, 2).
+    edge_attr : np.memmap
+        Bond order of every edge, float32 (n_edges, 1).
+    node_ptr, edge_ptr : np.ndarray
+        Per-graph offsets into the node and edge arrays.
+
+    '''
+
+    def __init__(self, root : str):
+        with open(os.path.join(root, 'meta.json')) as handle:
+            self.meta = json.load(handle)
+        self.node_ptr = np.load(os.path.join(root, 'node_ptr.npy'))
+        self.edge_ptr = np.load(os.path.join(root, 'edge_ptr.npy'))
+        rows = {'x': self.meta['n_nodes'], 'edge_index': self.meta['n_edges'],
+                'edge_attr': self.meta['n_edges']}
+        for name, (dtype, width) in _FILES.items():
+            path = os.path.join(root, f'{name}.bin')
+            if rows[name] == 0:
+                setattr(self, name, np.empty((0, width), dtype=dtype))
+            else:
+                setattr(self, name, np.memmap(path, dtype=dtype, mode='r',
+                                              shape=(rows[name], width)))
+
+    def __len__(self):
+        return self.meta['n_graphs']
+
+    def batch_range(self, start : int, stop : int):
+        '''
+        Batch of graphs start..stop-1.
+
+        Returns
+        -------
+        dict
+            ``x`` and ``edge_attr`` views, ``edge_index`` (2, n_edges) int32
+            relative to the first node of the batch, ``ptr`` node offsets of
+            every graph in the batch and ``batch`` the graph id of every node.
+
+        '''
+        n0, n1 = self.node_ptr[start], self.node_ptr[stop]
+        e0, e1 = self.edge_ptr[start], self.edge_ptr[stop]
+        ptr = self.node_ptr[start:stop + 1] - n0
+        return {'x': self.x[n0:n1],
+                'edge_index': (self.edge_index[e0:e1] - np.int32(n0)).T,
+                'edge_attr': self.edge_attr[e0:e1],
+                'ptr': ptr,
+                'batch': np.repeat(np.arange(stop - start, dtype=np.int32), np.diff(ptr))}
+
+    def __getitem__(self, k : int):
+        return self.batch_range(k, k + 1)
+
+    def iter_batches(self, batch_size : int = 256, shuffle : bool = False, seed : int = None):
+        '''
+        Iterate over contiguous batches of ``batch_size`` graphs. With
+        ``shuffle`` the order of the batches (not their content) is
+        randomized, which keeps every batch a zero-copy view.
+        '''
+        starts = np.arange(0, len(self), batch_size)
+        if shuffle:
+            np.random.default_rng(seed).shuffle(starts)
+        for start in starts:
+            yield self.batch_range(int(start), min(int(start) + batch_size, len(self)))
+
+
+if __name__ == "__main__":
+    from rdkit import Chem
+    from Conformers import read_smiles
+
+    parser = argparse.ArgumentParser(description='Featurize SMILES into a memory-mapped graph dataset')
+    parser.add_argument('-i', '--input', help='File with one SMILE per line ("-" for stdin)',
+                        action='store', type = str, required=True)
+    parser.add_argument('-o', '--output', help='Output directory',
+                        action='store', type = str, default='graph_dataset')
+    parser.add_argument('--no_hs', help='Do not add explicit hydrogens',
+                        action='store_true')
+    args = parser.parse_args()
+
+    def graphs():
+        for smi in read_smiles(args.input):
+            mol = Chem.MolFromSmiles(smi)
+            if mol is None:
+                print(f'Skipping invalid SMILES: {smi}')
+                continue
+            yield mol if args.no_hs else Chem.AddHs(mol)
+
+    n = write_graph_dataset(args.output, graphs())
+    print(f'{n} graphs written to {args.output}')
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:36:29 2026
+
+@author: alfonsocabezonvizoso
+"""
+
+import numpy as np
+from NeighborList import cell_list_pairs
+
+
+def pca_projection(coords):
+    '''
+    Project 3D coordinates onto the plane of their two largest principal
+    axes, which shows the molecule from the direction where it is flattest.
+
+    Parameters
+    ----------
+    coords : np.ndarray
+        Coordinates, shape (n_atoms, 3).
+
+    Returns
+    -------
+    np.ndarray
+        Centered 2D coordinates, shape (n_atoms, 2).
+
+    '''
+    centered = np.asarray(coords, dtype=float) - np.mean(coords, axis=0)
+    # Right singular vectors are the principal axes, largest first
+    _, _, vt = np.linalg.svd(centered, full_matrices=False)
+    xy = centered @ vt[:2].T
+    # Fix the sign of every axis so the picture does not flip between runs
+    signs = np.sign(np.sum(xy ** 3, axis=0))
+    signs[signs == 0] = 1
+    return xy * signs
+
+
+def resolve_overlaps(xy, min_dist : float, n_iter : int = 100, stiffness : float = 0.05,
+                     tol : float = 0.05):
+    '''
+    Push apart nodes closer than ``min_dist`` with a grid-accelerated
+    repulsion pass.
+
+    Close pairs are found with the cell list of NeighborList.py in a box
+    large enough to avoid periodic images. Each overlapping pair is moved
+    apart symmetrically by its overlap, and every node is pulled back toward
+    its start position with a decaying ``stiffness`` so the drawing keeps
+    its shape. Iteration stops once no pair overlaps by more than
+    ``tol * min_dist``.
+
+    Parameters
+    ----------
+    xy : np.ndarray
+        2D positions, shape (n, 2).
+    min_dist : float
+        Smallest allowed distance between node centers.
+    n_iter : int, optional
+        Maximum number of passes. The default is 100.
+    stiffness : float, optional
+        Fraction of the displacement from the start position undone in the
+        first pass, reduced by 10% every pass. The default is 0.05.
+    tol : float, optional
+        Relative overlap that is tolerated. The default is 0.05.
+
+    Returns
+    -------
+    np.ndarray
+        Adjusted positions, shape (n, 2).
+
+    '''
+    start = np.asarray(xy, dtype=float)
+    pos = start.copy()
+    rng = np.random.default_rng(0)
+    for it in range(n_iter):
+        lower = pos.min(axis=0)
+        box = pos.max(axis=0) - lower + 2 * min_dist
+        i, j = cell_list_pairs(pos - lower, box, min_dist)
+        d = pos[j] - pos[i]
+        r = np.sqrt(np.einsum('ij,ij->i', d, d))
+        keep = r < (1 - tol) * min_dist
+        if not keep.any():
+            break
+        i, j, d, r = i[keep], j[keep], d[keep], r[keep]
+        # Coincident nodes get a random direction
+        tiny = r < 1e-9
+        d[tiny] = rng.normal(size=(tiny.sum(), 2))
+        r[tiny] = np.linalg.norm(d[tiny], axis=1)
+        push = (0.5 * (min_dist - r) / r)[:, None] * d
+        shift = np.zeros_like(pos)
+        np.subtract.at(shift, i, push)
+        np.add.at(shift, j, push)
+        pos -= stiffness * 0.9 ** it * (pos - start)
+        pos += shift
+    return pos
+
+
+def layout_2d(coords, min_dist : float = 1.0, **kwargs):
+    '''
+    2D drawing coordinates of a conformer: PCA projection followed by
+    ``resolve_overlaps``. Extra keyword arguments go to ``resolve_overlaps``.
+    '''
+    return resolve_overlaps(pca_projection(coords), min_dist, **kwargs)
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:40:53 2026
+
+@author: alfonsocabezonvizoso
+"""
+
+import argparse
+import csv
+import json
+import time
+import tracemalloc
+import numpy as np
+import matplotlib.pyplot as plt
+plt.rcParams["font.family"] = "serif"
+plt.rcParams["font.serif"] = ["Times New Roman"]
+from LeapFrogIntegrator import LeapFrog
+
+
+class RK4:
+    '''
+    Classical fourth-order Runge-Kutta integrator with the same interface as
+    LeapFrog, used as a reference in the benchmark. It is not symplectic, so
+    its energy drifts systematically for long runs.
+    '''
+
+    def __init__(self, positions, velocities, masses, force, dt):
+        self.r = positions
+        self.v = velocities
+        self.force = force
+        self.dt = float(dt)
+        self.t = 0.0
+        masses = np.broadcast_to(np.asarray(masses, dtype=positions.dtype),
+                                 len(positions))
+        self.masses = masses[:, None]
+        self.f = np.empty_like(positions)
+        self._r0 = np.empty_like(positions)
+        self._v0 = np.empty_like(positions)
+        self._kr = np.empty((4,) + positions.shape, dtype=positions.dtype)
+        self._kv = np.empty_like(self._kr)
+        self.potential = self.force(self.r, self.f)
+
+    def step(self):
+        '''
+        Advance the system by one timestep.
+        '''
+        dt = self.dt
+        self._r0[...] = self.r
+        self._v0[...] = self.v
+        for stage, frac in enumerate((0.5, 0.5, 1.0, None)):
+            self._kr[stage] = self.v
+            np.divide(self.f, self.masses, out=self._kv[stage])
+            if frac is None:
+                break
+            np.multiply(self._kr[stage], frac * dt, out=self.r)
+            self.r += self._r0
+            np.multiply(self._kv[stage], frac * dt, out=self.v)
+            self.v += self._v0
+            self.force(self.r, self.f)
+        self.r[...] = self._r0
+        self.v[...] = self._v0
+        for stage, weight in enumerate((1, 2, 2, 1)):
+            self.r += (weight * dt / 6) * self._kr[stage]
+            self.v += (weight * dt / 6) * self._kv[stage]
+        self.potential = self.force(self.r, self.f)
+        self.t += dt
+
+    def kinetic_energy(self):
+        '''
+        Kinetic energy at the current step.
+        '''
+        return 0.5 * float(np.sum(self.masses * self.v ** 2))
+
+
+# =============================================================================
+# Test systems. Every builder returns positions, velocities, masses, the force
+# callback and the timesteps to scan.
+# =============================================================================
+
+def harmonic_chain(n : int = 1000, k : float = 1.0, r0 : float = 1.0, seed : int = 0):
+    '''
+    Linear chain of n beads joined by harmonic springs of rest length r0.
+    '''
+    rng = np.random.default_rng(seed)
+    pos = np.zeros((n, 3))
+    pos[:, 0] = np.arange(n) * r0
+    vel = rng.normal(0, 0.1, (n, 3))
+    bond = np.empty((n - 1, 3))
+    length = np.empty((n - 1, 1))
+
+    def force(r, out):
+        np.subtract(r[1:], r[:-1], out=bond)
+        np.sqrt(np.einsum('ij,ij->i', bond, bond), out=length[:, 0])
+        stretch = length - r0
+        energy = 0.5 * k * float(np.sum(stretch ** 2))
+        np.multiply(bond, k * stretch / length, out=bond)
+        out[...] = 0.0
+        out[:-1] += bond
+        out[1:] -= bond
+        return energy
+
+    return pos, vel, 1.0, force, [0.01, 0.05, 0.1, 0.2]
+
+
+def lennard_jones_gas(n_side : int = 5, density : float = 0.3, temperature : float = 1.5,
+                      r_cut : float = 2.5, seed : int = 0):
+    '''
+    Lennard-Jones gas in reduced units in a cubic periodic box, started on a
+    simple cubic lattice. The potential is truncated and shifted at r_cut.
+    '''
+    rng = np.random.default_rng(seed)
+    n = n_side ** 3
+    L = (n / density) ** (1 / 3)
+    grid = np.arange(n_side) * L / n_side
+    pos = np.stack(np.meshgrid(grid, grid, grid, indexing='ij'), axis=-1).reshape(-1, 3)
+    vel = rng.normal(0, np.sqrt(temperature), (n, 3))
+    vel -= vel.mean(axis=0)
+    e_shift = 4 * (r_cut ** -12 - r_cut ** -6)
+    iu = np.triu_indices(n, k=1)
+
+    def force(r, out):
+        d = r[iu[0]] - r[iu[1]]
+        d -= L * np.round(d / L)
+        r2 = np.einsum('ij,ij->i', d, d)
+        inside = r2 < r_cut ** 2
+        inv6 = np.where(inside, r2 ** -3, 0.0)
+        energy = float(np.sum(4 * inv6 * (inv6 - 1) - inside * e_shift))
+        fpair = np.where(inside, 24 * inv6 * (2 * inv6 - 1) / r2, 0.0)[:, None] * d
+        out[...] = 0.0
+        np.add.at(out, iu[0], fpair)
+        np.subtract.at(out, iu[1], fpair)
+        return energy
+
+    return pos, vel, 1.0, force, [0.001, 0.002, 0.005]
+
+
+def double_well(n : int = 1000, seed : int = 0):
+    '''
+    Independent particles in the asymmetric double well V_base of
+    GaussianDepositionExample.py, (x**2 - 1)**2 - 0.5 + 0.3*x, applied to
+    each Cartesian component.
+    '''
+    rng = np.random.default_rng(seed)
+    pos = rng.choice([-1.0, 1.0], (n, 3)) + rng.normal(0, 0.1, (n, 3))
+    vel = rng.normal(0, 0.5, (n, 3))
+
+    def force(r, out):
+        np.multiply(r, r, out=out)
+        energy = float(np.sum((out - 1) ** 2 - 0.5 + 0.3 * r))
+        out -= 1
+        out *= r
+        out *= -4
+        out -= 0.3
+        return energy
+
+    return pos, vel, 1.0, force, [0.005, 0.01, 0.02, 0.05]
+
+
+SYSTEMS = {'harmonic_chain': harmonic_chain,
+           'lennard_jones': lennard_jones_gas,
+           'double_well': double_well}
+
+INTEGRATORS = {'leapfrog': lambda *a: LeapFrog(*a, scheme='leapfrog'),
+               'verlet': lambda *a: LeapFrog(*a, scheme='verlet'),
+               'rk4': RK4}
+
+
+def benchmark(system : str, integrator : str, dt : float, n_steps : int,
+              memory_steps : int = 100):
+    '''
+    Run one system with one integrator and timestep.
+
+    The timed run has allocation tracing off, since tracemalloc slows every
+    allocation by an amount that depends on the system. Peak memory comes
+    from a separate traced run of ``memory_steps`` steps on a fresh copy of
+    the system.
+
+    Returns
+    -------
+    dict
+        Wall time per step, steps per second, peak memory allocated by the
+        run, relative energy drift (slope of the total energy per unit time
+        divided by |E0|) and maximum relative energy error.
+
+    '''
+    pos, vel, masses, force, _ = SYSTEMS[system]()
+    engine = INTEGRATORS[integrator](pos, vel, masses, force, dt)
+    E = np.empty(n_steps + 1)
+    E[0] = engine.kinetic_energy() + engine.potential
+    start = time.perf_counter()
+    for k in range(1, n_steps + 1):
+        engine.step()
+        E[k] = engine.kinetic_energy() + engine.potential
+    wall = time.perf_counter() - start
+
+    pos, vel, masses, force, _ = SYSTEMS[system]()
+    tracemalloc.start()
+    engine = INTEGRATORS[integrator](pos, vel, masses, force, dt)
+    for _ in range(min(memory_steps, n_steps)):
+        engine.step()
+        engine.kinetic_energy()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    scale = abs(E[0]) if E[0] != 0 else 1.0
+    times = dt * np.arange(n_steps + 1)
+    slope = np.polyfit(times, E, 1)[0]
+    return {'system': system, 'integrator': integrator, 'dt': dt,
+            'n_steps': n_steps, 'n_particles': len(pos),
+            'time_per_step': wall / n_steps, 'steps_per_second': n_steps / wall,
+            'peak_memory_bytes': peak,
+            'energy_drift': float(slope / scale),
+            'max_energy_error': float(np.max(np.abs(E - E[0])) / scale)}
+
+
+def plot_results(results, filename : str):
+    '''
+    Energy drift against cost per step, one panel per system.
+    '''
+    systems = list(dict.fromkeys(r['system'] for r in results))
+    fig, axes = plt.subplots(1, len(systems), figsize=(6 * len(systems), 5),
+                             squeeze=False)
+    markers = {'leapfrog': 'o', 'verlet': 's', 'rk4': '^'}
+    for ax, system in zip(axes[0], systems):
+        for name in INTEGRATORS:
+            rows = [r for r in results if r['system'] == system and r['integrator'] == name]
+            if not rows:
+                continue
+            ax.loglog([r['time_per_step'] for r in rows],
+                      [max(abs(r['energy_drift']), 1e-16) for r in rows],
+                      marker=markers.get(name, 'o'), label=name)
+            for r in rows:
+                ax.annotate(f"{r['dt']:g}", (r['time_per_step'], max(abs(r['energy_drift']), 1e-16)),
+                            fontsize=10, xytext=(4, 4), textcoords='offset points')
+        ax.set_title(system.replace('_', ' '), fontsize=18)
+        ax.set_xlabel('Wall time per step (s)', fontsize=16)
+        ax.set_ylabel('|Relative energy drift| per unit time', fontsize=16)
+        ax.tick_params(direction='in', labelsize=12)
+        ax.legend(fontsize=12)
+    fig.tight_layout()
+    fig.savefig(filename, dpi=300)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark MD integrators')
+    parser.add_argument('-s', '--systems', nargs='+', default=list(SYSTEMS),
+                        choices=list(SYSTEMS), help='Systems to run')
+    parser.add_argument('-i', '--integrators', nargs='+', default=list(INTEGRATORS),
+                        choices=list(INTEGRATORS), help='Integrators to compare')
+    parser.add_argument('-n', '--n_steps', type=int, default=2000,
+                        help='Number of steps per run')
+    parser.add_argument('-o', '--output', type=str, default='integrator_benchmark',
+                        help='Prefix for the .json, .csv and .png outputs')
+    args = parser.parse_args()
+
+    results = []
+    for system in args.systems:
+        for dt in SYSTEMS[system]()[-1]:
+            for integrator in args.integrators:
+                res = benchmark(system, integrator, dt, args.n_steps)
+                print(f"{system:15s} {integrator:9s} dt={dt:<6g} "
+                      f"{res['steps_per_second']:10.1f} steps/s  "
+                      f"drift={res['energy_drift']:.3e}")
+                results.append(res)
+
+    with open(f'{args.output}.json', 'w') as handle:
+        json.dump(results, handle, indent=2)
+    with open(f'{args.output}.csv', 'w', newline='') as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(results[0]))
+        writer.writeheader()
+        writer.writerows(results)
+    plot_results(results, f'{args.output}.png')
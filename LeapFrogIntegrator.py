@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:02:15 2026
+
+@author: alfonsocabezonvizoso
+"""
+
+import numpy as np
+
+
+def leapfrog_timeline(n_steps : int, dt : float = 1.0, t0 : float = 0.0):
+    '''
+    Times at which the leapfrog scheme stores positions and velocities.
+
+    Positions live on the full steps t0 + k*dt and velocities on the half
+    steps t0 + (k - 1/2)*dt, which is the staggering drawn in
+    LeapFrogIntegrator_PLOT.py.
+
+    Parameters
+    ----------
+    n_steps : int
+        Number of integration steps.
+    dt : float, optional
+        Timestep. The default is 1.0.
+    t0 : float, optional
+        Initial time. The default is 0.0.
+
+    Returns
+    -------
+    r_times : np.ndarray
+        n_steps + 1 position times.
+    v_times : np.ndarray
+        n_steps + 1 velocity times, starting at t0 - dt/2.
+
+    '''
+    k = np.arange(n_steps + 1)
+    return t0 + k * dt, t0 + (k - 0.5) * dt
+
+
+class LeapFrog:
+    '''
+    Leapfrog / velocity-Verlet integrator working in place on (N, 3) arrays.
+
+    All work arrays are allocated in the constructor and in ``run``; a step
+    only calls the force callback and a handful of in-place NumPy updates.
+    The force callback has the signature ``force(positions, out)``, must
+    write the forces into ``out`` and return the potential energy.
+
+    Parameters
+    ----------
+    positions : np.ndarray
+        Initial positions, shape (N, 3). Updated in place.
+    velocities : np.ndarray
+        Initial velocities at t0, shape (N, 3). Updated in place. With the
+        leapfrog scheme they are shifted to t0 - dt/2 on construction.
+    masses : float or np.ndarray
+        Particle masses, scalar or shape (N,).
+    force : callable
+        Force callback ``force(positions, out) -> potential energy``.
+    dt : float
+        Timestep.
+    scheme : str, optional
+        'leapfrog' (velocities on half steps) or 'verlet' (velocity Verlet,
+        velocities on full steps). The default is 'leapfrog'.
+
+    '''
+
+    def __init__(self, positions : np.ndarray, velocities : np.ndarray, masses,
+                 force, dt : float, scheme : str = 'leapfrog'):
+        if scheme not in ('leapfrog', 'verlet'):
+            raise ValueError(f'Unknown scheme {scheme!r}')
+        self.r = positions
+        self.v = velocities
+        self.force = force
+        self.dt = float(dt)
+        self.scheme = scheme
+        self.t = 0.0
+        masses = np.broadcast_to(np.asarray(masses, dtype=positions.dtype),
+                                 len(positions))
+        self.masses = masses[:, None]
+        self._dt_over_m = (self.dt / self.masses).astype(positions.dtype)
+        self._half_dt_over_m = 0.5 * self._dt_over_m
+        self.f = np.empty_like(positions)
+        self._scratch = np.empty_like(positions)
+        self.potential = self.force(self.r, self.f)
+        if scheme == 'leapfrog':
+            # v(t0 - dt/2) = v(t0) - dt/2 * F(t0)/m
+            np.multiply(self.f, self._half_dt_over_m, out=self._scratch)
+            self.v -= self._scratch
+
+    def step(self):
+        '''
+        Advance the system by one timestep.
+        '''
+        kick = self._scratch
+        if self.scheme == 'leapfrog':
+            # v(t + dt/2) = v(t - dt/2) + dt F(t)/m ; r(t + dt) = r(t) + dt v(t + dt/2)
+            np.multiply(self.f, self._dt_over_m, out=kick)
+            self.v += kick
+            np.multiply(self.v, self.dt, out=kick)
+            self.r += kick
+            self.potential = self.force(self.r, self.f)
+        else:
+            np.multiply(self.f, self._half_dt_over_m, out=kick)
+            self.v += kick
+            np.multiply(self.v, self.dt, out=kick)
+            self.r += kick
+            self.potential = self.force(self.r, self.f)
+            np.multiply(self.f, self._half_dt_over_m, out=kick)
+            self.v += kick
+        self.t += self.dt
+
+    def kinetic_energy(self):
+        '''
+        Kinetic energy at the current full step. For the leapfrog scheme the
+        velocity at t is estimated as v(t - dt/2) + dt/2 * F(t)/m.
+        '''
+        v_full = self._scratch
+        if self.scheme == 'leapfrog':
+            np.multiply(self.f, self._half_dt_over_m, out=v_full)
+            v_full += self.v
+        else:
+            v_full[...] = self.v
+        np.square(v_full, out=v_full)
+        v_full *= self.masses
+        return 0.5 * v_full.sum()
+
+    def run(self, n_steps : int, stride : int = 1, energies : bool = False):
+        '''
+        Integrate ``n_steps`` steps, recording positions every ``stride`` steps.
+
+        Parameters
+        ----------
+        n_steps : int
+            Number of steps.
+        stride : int, optional
+            Steps between recorded frames. The default is 1.
+        energies : bool, optional
+            Also record kinetic and potential energy at every frame.
+
+        Returns
+        -------
+        traj : np.ndarray
+            Recorded positions, shape (n_steps // stride + 1, N, 3). The first
+            frame is the starting configuration.
+        E : np.ndarray
+            Only if ``energies`` is True. Kinetic and potential energy of each
+            frame, shape (n_frames, 2).
+
+        '''
+        n_frames = n_steps // stride + 1
+        traj = np.empty((n_frames,) + self.r.shape, dtype=self.r.dtype)
+        E = np.empty((n_frames, 2)) if energies else None
+        traj[0] = self.r
+        if energies:
+            E[0] = self.kinetic_energy(), self.potential
+        for k in range(1, n_steps + 1):
+            self.step()
+            if k % stride == 0:
+                frame = k // stride
+                traj[frame] = self.r
+                if energies:
+                    E[frame] = self.kinetic_energy(), self.potential
+        if energies:
+            return traj, E
+        return traj
+
+    def timeline(self, n_steps : int):
+        '''
+        Position and velocity times for the next ``n_steps`` steps of this
+        integrator, see ``leapfrog_timeline``.
+        '''
+        return leapfrog_timeline(n_steps, self.dt, self.t)
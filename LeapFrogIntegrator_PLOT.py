@@ -8,11 +8,15 @@ Created on Sat Jan 17 13:19:28 2026
 
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
+from LeapFrogIntegrator import leapfrog_timeline
 plt.rcParams["font.family"] = "serif"
 plt.rcParams["font.serif"] = ["Times New Roman"]
 
-def draw_leap_frog_diagram_v5():
+def draw_leap_frog_diagram_v5(n_steps=3):
     
+    # Staggered times used by the integrator, in units of dt
+    r_times, v_times = leapfrog_timeline(n_steps)
+
     plt.rcParams.update({
         "font.family": "serif",
         "mathtext.fontset": "cm" 
@@ -25,10 +29,11 @@ def draw_leap_frog_diagram_v5():
     # Main horizontal line
     # ax.plot([-0.8, 3.4], [0, 0], 'k-', lw=3)
     # Arrow at the end
-    ax.annotate("", xy=(3.55, 0), xytext=(-0.8, 0),
+    t_end = r_times[-1] + 0.55
+    ax.annotate("", xy=(t_end, 0), xytext=(-0.8, 0),
                 arrowprops=dict(arrowstyle="->", lw=3, color='k'))
     # Label 't'
-    ax.text(3.6, 0, r"$t$", fontsize=26, va='center', ha='left')
+    ax.text(t_end + 0.05, 0, r"$t$", fontsize=26, va='center', ha='left')
 
     # PARAMETERS
     rad = -0.85           # Curvature of arcs
@@ -51,7 +56,7 @@ def draw_leap_frog_diagram_v5():
     # We want labels/ticks at: 0, 1, 2, 3
     
     # Draw Arcs
-    x_arc_starts = [0, 1.0, 2.0]
+    x_arc_starts = r_times[:-1]
     for start in x_arc_starts:
         end = start + 1.0
         # Draw Arc
@@ -66,7 +71,7 @@ def draw_leap_frog_diagram_v5():
 
     # Draw Ticks and Equations for X
     # Points: 0, 1, 2, 3
-    x_points = [0, 1, 2, 3]
+    x_points = r_times
     for i, t in enumerate(x_points):
         # Tick mark
         ax.plot([t, t], [0, -tick_len], color="black", lw=3)
@@ -88,7 +93,7 @@ def draw_leap_frog_diagram_v5():
     # We want labels/ticks at: -0.5, 0.5, 1.5, 2.5
     
     # Draw Arcs
-    v_arc_starts = [-0.5, 0.5, 1.5]
+    v_arc_starts = v_times[:-1]
     for start in v_arc_starts:
         end = start + 1.0
         # Draw Arc
@@ -103,7 +108,7 @@ def draw_leap_frog_diagram_v5():
 
     # Draw Ticks and Equations for V
     # Points: -0.5, 0.5, 1.5, 2.5
-    v_points = [-0.5, 0.5, 1.5, 2.5]
+    v_points = v_times
     for i, t in enumerate(v_points):
         # Tick mark
         ax.plot([t, t], [0, -tick_len], color=color_v, lw=3)
@@ -122,7 +127,7 @@ def draw_leap_frog_diagram_v5():
         ax.text(t, y_eq_v, txt, ha='center', va='top', fontsize=22, color=color_v)
 
     # 5. Clean up
-    ax.set_xlim(-1.0, 4.0)
+    ax.set_xlim(-1.0, r_times[-1] + 1.0)
     ax.set_ylim(-0.8, 1.5) # Expanded bottom limit to fit staggered text
     ax.set_aspect('equal')
     ax.axis('off')
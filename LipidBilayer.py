@@ -7,11 +7,11 @@ Created on Tue Jan  6 19:30:58 2026
 """
 
 import matplotlib.pyplot as plt
-import matplotlib.patches as patches
+from matplotlib.collections import EllipseCollection, LineCollection
 plt.rcParams["font.family"] = "serif"
 plt.rcParams["font.serif"] = ["Times New Roman"]
 import numpy as np
-import random
+from MembraneBuilder import ring_geometry, sample_species
 
 def get_lipid_style(lipid_name):
     styles = {
@@ -22,38 +22,42 @@ def get_lipid_style(lipid_name):
     }
     return styles.get(lipid_name, {'color': 'gray', 'label': '?'})
 
-def draw_curly_tail(ax, head_x, head_y, angle_rad, length=2.0, thickness=1.2, leaflet_type='outer'):
-    t = np.linspace(0, length, 20)
-    
-    if leaflet_type == 'outer':
-        direction = -1 
-    else:
-        direction = 1
-
-    amp = 0.17
-    freq = 5
-    
-    offset_x1 = -0.15 
-    tail1_u = t * direction 
-    tail1_v = offset_x1 + (np.sin(t * freq) * amp)
-    
-    offset_x2 = 0.15
-    tail2_u = t * direction
-    tail2_v = offset_x2 + (np.sin(t * freq + 2) * amp)
-
-    cos_a = np.cos(angle_rad)
-    sin_a = np.sin(angle_rad)
-    
-    t1_x = head_x + (tail1_u * cos_a - tail1_v * sin_a)
-    t1_y = head_y + (tail1_u * sin_a + tail1_v * cos_a)
-    
-    t2_x = head_x + (tail2_u * cos_a - tail2_v * sin_a)
-    t2_y = head_y + (tail2_u * sin_a + tail2_v * cos_a)
+def tail_template(length=2.0, n_points=20, amp=0.17, freq=5):
+    """
+    Both curly tails of a lipid in its own frame, computed once: u runs
+    along the tail (away from the head) and v across it.
+
+    Returns a (2, n_points, 2) array of (u, v) points.
+    """
+    t = np.linspace(0, length, n_points)
+    offsets = np.array([-0.15, 0.15])
+    phases = np.array([0, 2])
+    v = offsets[:, None] + np.sin(t[None, :] * freq + phases[:, None]) * amp
+    return np.stack([np.broadcast_to(t, v.shape), v], axis=-1)
+
+def draw_curly_tails(ax, heads, angles, directions, template, thickness=1.2):
+    """
+    Draws the tails of all lipids as one LineCollection: the template is
+    flipped along u by `directions` (-1 points toward the ring center for the
+    outer leaflet, +1 away from it for the inner one), rotated by `angles`
+    with a batch of rotation matrices and translated to `heads`.
+    """
+    heads = np.asarray(heads)[:, :2]
+    cos_a, sin_a = np.cos(angles), np.sin(angles)
+    rotations = np.stack([np.stack([cos_a, -sin_a], axis=-1),
+                          np.stack([sin_a, cos_a], axis=-1)], axis=-2)   # (L, 2, 2)
+    local = template[None] * np.stack([np.asarray(directions, dtype=float),
+                                       np.ones(len(heads))], axis=-1)[:, None, None, :]
+    tails = heads[:, None, None, :] + np.einsum('lij,ltpj->ltpi', rotations, local)
+    ax.add_collection(LineCollection(tails.reshape(-1, template.shape[1], 2),
+                                     colors='#444444', linewidths=thickness, zorder=1))
 
-    ax.plot(t1_x, t1_y, color='#444444', lw=thickness, zorder=1) 
-    ax.plot(t2_x, t2_y, color='#444444', lw=thickness, zorder=1)
+def draw_curly_tail(ax, head_x, head_y, angle_rad, length=2.0, thickness=1.2, leaflet_type='outer'):
+    direction = -1 if leaflet_type == 'outer' else 1
+    draw_curly_tails(ax, [(head_x, head_y)], [angle_rad], [direction],
+                     tail_template(length), thickness=thickness)
 
-def draw_membrane_final():
+def draw_membrane_final(seed=0):
     fig, ax = plt.subplots(figsize=(10, 10))
     ax.set_aspect('equal')
     ax.axis('off')
@@ -95,70 +99,49 @@ def draw_membrane_final():
     # =============================================================================
 
 
-    # Create base angles and apply rotation
-    angles_outer = np.linspace(0, 2*np.pi, num_lipids_outer, endpoint=False)
-    angles_outer += np.radians(rotation_outer) # Apply rotation
-
-    angles_inner = np.linspace(0, 2*np.pi, num_lipids_inner, endpoint=False)
-    angles_inner += np.radians(rotation_inner) # Apply rotation
-
-
-    mammalian_outer_dist = ['PC']*80 + ['PE']*20
-    mammalian_inner_dist = ['PE']*40 + ['PS']*60
-    bacterial_outer_dist = ['PE']*45 + ['PG']*45 + ["PC"]*10
-    bacterial_inner_dist = ['PE']*45 + ['PG']*45 + ["PC"]*10
-
-    # --- DRAW OUTER LEAFLET ---
-    for theta in angles_outer:
-        # Normalize angle to 0-360 for consistent domain checking
-        deg = np.degrees(theta) % 360
-        
-        # Determine Mammalian (Left) vs Bacterial (Right)
-        # 90 to 270 is Left
-        is_mammalian = 90 <= deg <= 270
-        
-        if is_mammalian:
-            lipid_choice = random.choice(mammalian_outer_dist)
-        else:
-            lipid_choice = random.choice(bacterial_outer_dist)
-            
-        style = get_lipid_style(lipid_choice)
-        
-        draw_curly_tail(ax, r_outer*np.cos(theta), r_outer*np.sin(theta), theta, 
-                        length=tail_len, thickness=tail_thickness, leaflet_type='outer')
-        
-        circle = patches.Circle((r_outer*np.cos(theta), r_outer*np.sin(theta)), radius=head_radius, 
-                                facecolor=style['color'], edgecolor='black', zorder=10)
-        ax.add_patch(circle)
-        
-        if style['label'] in ['PS', 'PG']:
-             dist = r_outer + head_radius + 0.4 
-             ax.text(dist*np.cos(theta), dist*np.sin(theta), "-", 
-                     ha='center', va='center', fontsize=sign_size, fontweight='bold')
-
-    # --- DRAW INNER LEAFLET ---
-    for theta in angles_inner:
-        deg = np.degrees(theta) % 360
-        is_mammalian = 90 <= deg <= 270
-        
-        if is_mammalian:
-            lipid_choice = random.choice(mammalian_inner_dist)
-        else:
-            lipid_choice = random.choice(bacterial_inner_dist)
-            
-        style = get_lipid_style(lipid_choice)
-        
-        draw_curly_tail(ax, r_inner*np.cos(theta), r_inner*np.sin(theta), theta, 
-                        length=tail_len, thickness=tail_thickness, leaflet_type='inner')
-        
-        circle = patches.Circle((r_inner*np.cos(theta), r_inner*np.sin(theta)), radius=head_radius, 
-                                facecolor=style['color'], edgecolor='black', zorder=10)
-        ax.add_patch(circle)
-        
-        if style['label'] in ['PS', 'PG']:
-             dist = r_inner - head_radius - 0.4
-             ax.text(dist*np.cos(theta), dist*np.sin(theta), "-", 
-                     ha='center', va='center', fontsize=sign_size, fontweight='bold')
+    # =============================================================================
+    # ADJUST COMPOSITIONS (fractions per leaflet)
+    # =============================================================================
+    mammalian_outer_dist = {'PC': 0.8, 'PE': 0.2}
+    mammalian_inner_dist = {'PE': 0.4, 'PS': 0.6}
+    bacterial_outer_dist = {'PE': 0.45, 'PG': 0.45, 'PC': 0.1}
+    bacterial_inner_dist = {'PE': 0.45, 'PG': 0.45, 'PC': 0.1}
+    # =============================================================================
+
+    # The figure is the ring cross-section of MembraneBuilder: head positions
+    # and normals of both leaflets (0 outer, 1 inner)
+    heads, normals, leaflet, _ = ring_geometry((num_lipids_outer, num_lipids_inner),
+                                               radius=r_outer, gap=inter_leaflet_gap,
+                                               rotation=(rotation_outer, rotation_inner))
+    angles = np.arctan2(heads[:, 1], heads[:, 0])
+
+    # Mammalian (left, 90 to 270 degrees) vs bacterial (right) halves, each
+    # with exact counts of every lipid type
+    deg = np.degrees(angles) % 360
+    is_mammalian = (deg >= 90) & (deg <= 270)
+    rng = np.random.default_rng(seed)
+    species = np.empty(len(heads), dtype='<U4')
+    dists = {(0, True): mammalian_outer_dist, (0, False): bacterial_outer_dist,
+             (1, True): mammalian_inner_dist, (1, False): bacterial_inner_dist}
+    for (k, mammalian), fractions in dists.items():
+        mask = (leaflet == k) & (is_mammalian == mammalian)
+        species[mask] = sample_species(int(mask.sum()), fractions, rng)
+
+    # Every lipid is drawn at once: one collection of tails, one of heads and
+    # one of charge signs, whatever the number of lipids
+    styles = [get_lipid_style(lipid) for lipid in species]
+    draw_curly_tails(ax, heads, angles, np.where(leaflet == 0, -1, 1),
+                     tail_template(tail_len), thickness=tail_thickness)
+    ax.add_collection(EllipseCollection(2*head_radius, 2*head_radius, 0, units='xy',
+                                        offsets=heads[:, :2], offset_transform=ax.transData,
+                                        facecolors=[style['color'] for style in styles],
+                                        edgecolors='black', linewidths=1, zorder=10))
+    
+    # Charge sign on the solvent side of the heads
+    charged = np.array([style['label'] in ['PS', 'PG'] for style in styles], dtype=bool)
+    signs = heads[charged, :2] + (head_radius + 0.4) * normals[charged, :2]
+    ax.scatter(signs[:, 0], signs[:, 1], marker='_', s=(sign_size/3)**2,
+               linewidths=sign_size/10, color='black', zorder=10)
 
     ax.plot([0, 0], [20, -18], color='black', lw=3, zorder=5, ls = "--")
     
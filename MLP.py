@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:48:19 2026
+
+@author: alfonsocabezonvizoso
+"""
+
+import argparse
+import os
+import numpy as np
+
+
+def _tanh(z):
+    np.tanh(z, out=z)
+
+
+def _relu(z):
+    np.maximum(z, 0, out=z)
+
+
+def _sigmoid(z):
+    np.negative(z, out=z)
+    np.exp(z, out=z)
+    z += 1
+    np.reciprocal(z, out=z)
+
+
+def _linear(z):
+    pass
+
+
+# Derivatives written in terms of the activation a = f(z), into tmp
+def _dtanh(a, tmp):
+    np.multiply(a, a, out=tmp)
+    np.subtract(1, tmp, out=tmp)
+
+
+def _drelu(a, tmp):
+    # a >= 0, so its sign is the step function
+    np.sign(a, out=tmp)
+
+
+def _dsigmoid(a, tmp):
+    np.subtract(1, a, out=tmp)
+    tmp *= a
+
+
+ACTIVATIONS = {'tanh': (_tanh, _dtanh), 'relu': (_relu, _drelu),
+               'sigmoid': (_sigmoid, _dsigmoid), 'linear': (_linear, None)}
+
+
+class SGD:
+    '''
+    Mini-batch gradient descent with momentum on a flat parameter buffer.
+    '''
+
+    def __init__(self, lr : float = 1e-2, momentum : float = 0.9):
+        self.lr = lr
+        self.momentum = momentum
+        self._velocity = None
+
+    def step(self, params, grads):
+        if self._velocity is None:
+            self._velocity = np.zeros_like(params)
+            self._tmp = np.empty_like(params)
+        np.multiply(grads, self.lr, out=self._tmp)
+        self._velocity *= self.momentum
+        self._velocity -= self._tmp
+        params += self._velocity
+
+
+class Adam:
+    '''
+    Adam (Kingma and Ba) on a flat parameter buffer: one vectorized update
+    of all layers per step, with the moment estimates kept in two buffers
+    shaped like the parameters.
+    '''
+
+    def __init__(self, lr : float = 1e-3, beta1 : float = 0.9, beta2 : float = 0.999,
+                 eps : float = 1e-8):
+        self.lr = lr
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.eps = eps
+        self.t = 0
+        self._m = None
+
+    def step(self, params, grads):
+        if self._m is None:
+            self._m = np.zeros_like(params)
+            self._v = np.zeros_like(params)
+            self._tmp = np.empty_like(params)
+        self.t += 1
+        m, v, tmp = self._m, self._v, self._tmp
+        m *= self.beta1
+        np.multiply(grads, 1 - self.beta1, out=tmp)
+        m += tmp
+        v *= self.beta2
+        np.multiply(grads, grads, out=tmp)
+        tmp *= 1 - self.beta2
+        v += tmp
+        # Bias corrections folded into the step size
+        lr = self.lr * np.sqrt(1 - self.beta2 ** self.t) / (1 - self.beta1 ** self.t)
+        np.sqrt(v, out=tmp)
+        tmp += self.eps
+        np.divide(m, tmp, out=tmp)
+        tmp *= lr
+        params -= tmp
+
+
+OPTIMIZERS = {'sgd': SGD, 'adam': Adam}
+
+
+class MLP:
+    '''
+    Fully connected network for regression, described by the same layer
+    list as ``MLP_ARCH_PLOT.draw_mlp`` (e.g. [3, 6, 4, 1]).
+
+    All weights and biases live in one contiguous float32 buffer,
+    ``params``, and ``weights`` / ``biases`` are (n_in, n_out) / (n_out,)
+    views into it; gradients have the same layout in ``grads``. Optimizers
+    therefore update the whole network with a few vector operations.
+    Activations, deltas and the input batch are preallocated for the batch
+    size and reused, so forward and backward passes do not allocate arrays.
+
+    Parameters
+    ----------
+    layer_sizes : list of int
+        Neurons per layer, input first.
+    activation : str, optional
+        Hidden activation: 'tanh', 'relu', 'sigmoid' or 'linear'. The
+        default is 'tanh'.
+    output_activation : str, optional
+        Activation of the output layer. The default is 'linear'.
+    seed : int, optional
+        Seed of the weight initialization.
+
+    '''
+
+    def __init__(self, layer_sizes, activation : str = 'tanh',
+                 output_activation : str = 'linear', seed=None):
+        if len(layer_sizes) < 2:
+            raise ValueError('An MLP needs at least an input and an output layer')
+        for name in (activation, output_activation):
+            if name not in ACTIVATIONS:
+                raise ValueError(f'Unknown activation {name!r}, use one of {sorted(ACTIVATIONS)}')
+        self.layer_sizes = [int(n) for n in layer_sizes]
+        self.activation = activation
+        self.output_activation = output_activation
+        sizes = [n_in * n_out + n_out for n_in, n_out in zip(self.layer_sizes[:-1], self.layer_sizes[1:])]
+        self.params = np.zeros(sum(sizes), dtype=np.float32)
+        self.grads = np.zeros_like(self.params)
+        self.weights, self.biases = self._views(self.params)
+        self._grad_weights, self._grad_biases = self._views(self.grads)
+        self._batch_size = 0
+        # Glorot uniform weights, zero biases
+        rng = np.random.default_rng(seed)
+        for W in self.weights:
+            limit = np.sqrt(6 / sum(W.shape))
+            W[...] = rng.uniform(-limit, limit, W.shape)
+
+    @property
+    def n_layers(self):
+        return len(self.layer_sizes) - 1
+
+    def _views(self, buffer):
+        weights, biases = [], []
+        first = 0
+        for n_in, n_out in zip(self.layer_sizes[:-1], self.layer_sizes[1:]):
+            weights.append(buffer[first:first + n_in * n_out].reshape(n_in, n_out))
+            first += n_in * n_out
+            biases.append(buffer[first:first + n_out])
+            first += n_out
+        return weights, biases
+
+    def _allocate(self, batch_size : int):
+        '''
+        Activation, delta, scratch and target buffers for batches of up to
+        ``batch_size`` samples; smaller batches use their leading rows.
+        '''
+        if batch_size <= self._batch_size:
+            return
+        self._acts = [np.empty((batch_size, n), dtype=np.float32) for n in self.layer_sizes]
+        self._deltas = [np.empty((batch_size, n), dtype=np.float32) for n in self.layer_sizes]
+        self._tmp = [np.empty((batch_size, n), dtype=np.float32) for n in self.layer_sizes]
+        self._targets = np.empty((batch_size, self.layer_sizes[-1]), dtype=np.float32)
+        self._batch_size = batch_size
+
+    def _forward(self, b : int):
+        # Input already in self._acts[0][:b]
+        hidden = ACTIVATIONS[self.activation][0]
+        for l, (W, bias) in enumerate(zip(self.weights, self.biases)):
+            z = self._acts[l + 1][:b]
+            np.matmul(self._acts[l][:b], W, out=z)
+            z += bias
+            if l == self.n_layers - 1:
+                ACTIVATIONS[self.output_activation][0](z)
+            else:
+                hidden(z)
+        return self._acts[-1][:b]
+
+    def _backward(self, y, b : int):
+        '''
+        Gradients of the mean squared error of the last forward pass with
+        respect to all parameters, written into ``grads``. Returns the loss.
+        '''
+        L = self.n_layers
+        delta = self._deltas[L][:b]
+        np.subtract(self._acts[L][:b], y, out=delta)
+        loss = float(np.vdot(delta, delta)) / delta.size
+        delta *= 2 / delta.size
+        derivative = ACTIVATIONS[self.output_activation][1]
+        for l in range(L, 0, -1):
+            delta = self._deltas[l][:b]
+            if derivative is not None:
+                tmp = self._tmp[l][:b]
+                derivative(self._acts[l][:b], tmp)
+                delta *= tmp
+            np.matmul(self._acts[l - 1][:b].T, delta, out=self._grad_weights[l - 1])
+            np.sum(delta, axis=0, out=self._grad_biases[l - 1])
+            if l > 1:
+                np.matmul(delta, self.weights[l - 1].T, out=self._deltas[l - 1][:b])
+            derivative = ACTIVATIONS[self.activation][1]
+        return loss
+
+    def _check(self, X, y=None):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.layer_sizes[0]:
+            raise ValueError(f'Expected inputs of shape (n, {self.layer_sizes[0]}), got {X.shape}')
+        if y is None:
+            return X
+        y = np.ascontiguousarray(y, dtype=np.float32).reshape(len(X), -1)
+        if y.shape[1] != self.layer_sizes[-1]:
+            raise ValueError(f'Expected targets of shape (n, {self.layer_sizes[-1]}), got {y.shape}')
+        return X, y
+
+    def predict(self, X, batch_size : int = 1024):
+        '''
+        Network outputs for inputs ``X`` (n, n_in), computed in batches.
+        '''
+        X = self._check(X)
+        self._allocate(min(batch_size, len(X)))
+        output = np.empty((len(X), self.layer_sizes[-1]), dtype=np.float32)
+        for first in range(0, len(X), self._batch_size):
+            b = min(self._batch_size, len(X) - first)
+            self._acts[0][:b] = X[first:first + b]
+            output[first:first + b] = self._forward(b)
+        return output
+
+    def fit(self, X, y, epochs : int = 100, batch_size : int = 64, optimizer='adam',
+            lr : float = None, seed=None, verbose : bool = False):
+        '''
+        Train on (X, y) with mini-batches drawn in a new random order every
+        epoch, minimizing the mean squared error.
+
+        Parameters
+        ----------
+        X : np.ndarray
+            Inputs, shape (n, n_in).
+        y : np.ndarray
+            Targets, shape (n, n_out) or (n,) for one output.
+        epochs : int, optional
+            Passes over the data. The default is 100.
+        batch_size : int, optional
+            Samples per step. The default is 64.
+        optimizer : str or optimizer, optional
+            'adam', 'sgd' or an object with a ``step(params, grads)``
+            method. Passing the same object again continues its state. The
+            default is 'adam'.
+        lr : float, optional
+            Learning rate of a named optimizer. The default is the
+            optimizer's.
+        seed : int, optional
+            Seed of the shuffling.
+        verbose : bool, optional
+            Print the loss of every epoch.
+
+        Returns
+        -------
+        list
+            Mean training loss of every epoch.
+
+        '''
+        X, y = self._check(X, y)
+        if isinstance(optimizer, str):
+            if optimizer not in OPTIMIZERS:
+                raise ValueError(f'Unknown optimizer {optimizer!r}, use one of {sorted(OPTIMIZERS)}')
+            optimizer = OPTIMIZERS[optimizer](**({} if lr is None else {'lr': lr}))
+        batch_size = min(batch_size, len(X))
+        self._allocate(batch_size)
+        rng = np.random.default_rng(seed)
+        order = np.arange(len(X))
+        history = []
+        for epoch in range(epochs):
+            rng.shuffle(order)
+            total = 0.0
+            for first in range(0, len(X), batch_size):
+                index = order[first:first + batch_size]
+                b = len(index)
+                np.take(X, index, axis=0, out=self._acts[0][:b])
+                np.take(y, index, axis=0, out=self._targets[:b])
+                self._forward(b)
+                total += self._backward(self._targets[:b], b) * b
+                optimizer.step(self.params, self.grads)
+            history.append(total / len(X))
+            if verbose:
+                print(f'Epoch {epoch + 1}: loss {history[-1]:.6g}')
+        return history
+
+    def save(self, path : str):
+        '''
+        Write the network to an ``.npz`` file, replaced atomically.
+        '''
+        tmp = f'{path}.tmp.npz'
+        np.savez(tmp, layer_sizes=self.layer_sizes, params=self.params,
+                 activation=self.activation, output_activation=self.output_activation)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path : str):
+        '''
+        Restore a network written by ``save``.
+        '''
+        with np.load(path) as data:
+            model = cls(data['layer_sizes'].tolist(), activation=str(data['activation']),
+                        output_activation=str(data['output_activation']))
+            model.params[...] = data['params']
+        return model
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Train an MLP surrogate on tabulated inputs and targets')
+    parser.add_argument('-i', '--input', help='Training data (.npz with arrays X and y)',
+                        action='store', type = str, required=True)
+    parser.add_argument('-l', '--layers', help='Hidden layer sizes, e.g. 6,4 (input and output sizes come from the data)',
+                        action='store', type = str, default='6,4')
+    parser.add_argument('-a', '--activation', help='Hidden activation (tanh, relu, sigmoid or linear)',
+                        action='store', type = str, default='tanh')
+    parser.add_argument('--optimizer', help='adam or sgd',
+                        action='store', type = str, default='adam')
+    parser.add_argument('--lr', help='Learning rate (default: the optimizer\'s)',
+                        action='store', type = float, default=None)
+    parser.add_argument('-e', '--epochs', help='Passes over the data',
+                        action='store', type = int, default=100)
+    parser.add_argument('-b', '--batch_size', help='Samples per step',
+                        action='store', type = int, default=64)
+    parser.add_argument('-s', '--seed', help='Seed of the initialization and shuffling',
+                        action='store', type = int, default=0)
+    parser.add_argument('-o', '--output', help='Trained model (.npz)',
+                        action='store', type = str, default='mlp.npz')
+    args = parser.parse_args()
+
+    with np.load(args.input) as data:
+        X, y = data['X'], data['y']
+    y = y.reshape(len(y), -1)
+    hidden = [int(n) for n in args.layers.split(',') if n]
+    model = MLP([X.shape[1]] + hidden + [y.shape[1]], activation=args.activation, seed=args.seed)
+    history = model.fit(X, y, epochs=args.epochs, batch_size=args.batch_size,
+                        optimizer=args.optimizer, lr=args.lr, seed=args.seed)
+    model.save(args.output)
+    print(f'Layers {model.layer_sizes}, final loss {history[-1]:.6g}')
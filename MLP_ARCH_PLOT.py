@@ -7,17 +7,46 @@ Created on Mon Jan 19 18:30:57 2026
 """
 
 import matplotlib.pyplot as plt
-from matplotlib.patches import Circle
+from matplotlib.collections import EllipseCollection, LineCollection
+import numpy as np
 plt.rcParams["font.family"] = "serif"
 plt.rcParams["font.serif"] = ["Times New Roman"]
 
-def draw_mlp(layer_sizes, layer_colors):
+def layer_neurons(n, max_shown=10):
+    """
+    Neurons of a layer that are drawn and their vertical slots.
+    
+    Layers wider than max_shown are collapsed: only the first and last
+    max_shown // 2 neurons are kept and the slot between them holds an
+    ellipsis. Returns (indices, slots, n_slots, ellipsis_slot or None).
+    """
+    if max_shown is None or n <= max_shown:
+        idx = np.arange(n)
+        return idx, idx, n, None
+    k = max(max_shown // 2, 1)
+    idx = np.concatenate([np.arange(k), np.arange(n - k, n)])
+    slots = np.concatenate([np.arange(k), np.arange(k + 1, 2 * k + 1)])
+    return idx, slots, 2 * k + 1, k
+
+def draw_mlp(layer_sizes, layer_colors, weights=None, max_width=6.0, max_shown=10,
+             output="MLP_architecture.png"):
     """
     Draws a Multilayer Perceptron with specific styling.
     
+    All connections are one LineCollection and all neurons one
+    EllipseCollection, so the number of artists does not grow with the
+    layer widths.
+    
     Parameters:
     - layer_sizes: List of integers representing neurons per layer.
     - layer_colors: List of strings for the outline color of each layer.
+    - weights: Optional list of (n_in, n_out) weight matrices (e.g. MLP.weights).
+      Edge widths are then proportional to the weight magnitudes.
+    - max_width: Width of the edge with the largest weight magnitude.
+    - max_shown: Layers with more neurons are collapsed to their first and
+      last max_shown // 2 neurons with an ellipsis in between (None draws
+      every neuron).
+    - output: Path of the saved figure.
     """
     fig, ax = plt.subplots(figsize=(10, 10))
     
@@ -26,53 +55,57 @@ def draw_mlp(layer_sizes, layer_colors):
     h_spacing = 2.0   # Horizontal space between layers
     neuron_radius = 0.3
     
-    # Store coordinates of neurons to draw connections later
-    # Structure: layers_coords[layer_index][neuron_index] = (x, y)
-    layers_coords = []
-
-
     # 1. Calculate Coordinates
+    # Every layer keeps the indices of its drawn neurons and their (x, y),
+    # centered vertically: y = spacing * (slot - (total_slots - 1) / 2)
+    layers = []
     for i, n in enumerate(layer_sizes):
-        layer_nodes = []
-        layer_x = i * h_spacing
-        
-        # Center the neurons vertically
-        # y = spacing * (node_index - (total_nodes - 1) / 2)
-        for j in range(n):
-            layer_y = v_spacing * (j - (n - 1) / 2)
-            layer_nodes.append((layer_x, layer_y))
-        
-        layers_coords.append(layer_nodes)
+        idx, slots, n_slots, gap = layer_neurons(n, max_shown)
+        x = i * h_spacing
+        y = v_spacing * (slots - (n_slots - 1) / 2)
+        gap_y = None if gap is None else v_spacing * (gap - (n_slots - 1) / 2)
+        layers.append((idx, np.column_stack([np.full(len(idx), x), y]), gap_y))
 
     # 2. Draw Connections (Lines)
-    # We draw these first so they appear behind the neurons (zorder=1)
-    for i in range(len(layers_coords) - 1):
-        curr_layer = layers_coords[i]
-        next_layer = layers_coords[i + 1]
-        
-        for p1 in curr_layer:
-            for p2 in next_layer:
-                ax.plot([p1[0], p2[0]], [p1[1], p2[1]], 
-                        color='black', alpha=0.4, linewidth=2, zorder=1)
+    # One segment array for every pair of drawn neurons of consecutive layers,
+    # drawn first so it sits behind the neurons (zorder=1)
+    segments, widths = [], []
+    if weights is not None:
+        w_max = max(np.abs(W).max() for W in weights) or 1.0
+    for i in range(len(layers) - 1):
+        (idx1, xy1, _), (idx2, xy2, _) = layers[i], layers[i + 1]
+        pairs = np.empty((len(xy1), len(xy2), 2, 2))
+        pairs[:, :, 0] = xy1[:, None, :]
+        pairs[:, :, 1] = xy2[None, :, :]
+        segments.append(pairs.reshape(-1, 2, 2))
+        if weights is not None:
+            widths.append(max_width * np.abs(weights[i][np.ix_(idx1, idx2)]).ravel() / w_max)
+    ax.add_collection(LineCollection(np.concatenate(segments), colors='black', alpha=0.4,
+                                     linewidths=2 if weights is None else np.concatenate(widths),
+                                     zorder=1))
 
     # 3. Draw Neurons (Circles)
-    # We draw these second so they appear on top of lines (zorder=2)
-    for i, layer_nodes in enumerate(layers_coords):
-        color = layer_colors[i]
-        for x, y in layer_nodes:
-            # Create the circle patch
-            circle = Circle((x, y), radius=neuron_radius, 
-                            facecolor='white', edgecolor=color, 
-                            linewidth=4, zorder=2)
-            ax.add_patch(circle)
+    # One collection on top of the lines (zorder=2)
+    centers = np.concatenate([xy for _, xy, _ in layers])
+    edge_colors = [color for (idx, _, _), color in zip(layers, layer_colors) for _ in idx]
+    ax.add_collection(EllipseCollection(2 * neuron_radius, 2 * neuron_radius, 0, units='xy',
+                                        offsets=centers, offset_transform=ax.transData,
+                                        facecolors='white', edgecolors=edge_colors,
+                                        linewidths=4, zorder=2))
+    
+    # Vertical ellipsis (three dots) in the gap of collapsed layers
+    for (_, xy, gap_y), color in zip(layers, layer_colors):
+        if gap_y is not None:
+            dots = gap_y + v_spacing * np.array([-0.25, 0, 0.25])
+            ax.scatter(np.full(3, xy[0, 0]), dots, s=20, color=color, zorder=2)
+    
+    max_y_coord = centers[:, 1].max()
+    ax.update_datalim([[-neuron_radius, -max_y_coord - neuron_radius],
+                       [centers[:, 0].max() + neuron_radius, max_y_coord + neuron_radius]])
+    ax.autoscale_view()
 
     # 4. Add Layer Labels at the TOP - zorder=3 (front)
     
-    # Find the highest y-coordinate occupied by any neuron
-    max_layer_size = max(layer_sizes)
-    # The top neuron is at index (n-1). Using the formula from step 1:
-    max_y_coord = v_spacing * ((max_layer_size - 1) - (max_layer_size - 1) / 2)
-
     # Determine y-position for labels (above the highest neuron + radius + padding)
     label_y_pos = max_y_coord + neuron_radius + 0.5
     
@@ -80,16 +113,17 @@ def draw_mlp(layer_sizes, layer_colors):
     font_style = {'fontsize': 30, 'fontweight': 'bold', 'ha': 'center', 'va': 'bottom'}
 
     # Input Layer Label (centered horizontally over the first layer)
-    ax.text(layers_coords[0][0][0], label_y_pos, "Input Layer", 
+    ax.text(0, label_y_pos, "Input Layer", 
             color=layer_colors[0], **font_style)
 
-    # Hidden Layers Label (centered horizontally between the two hidden layers)
-    hidden_center_x = (layers_coords[1][0][0] + layers_coords[2][0][0]) / 2
-    ax.text(hidden_center_x, label_y_pos, "Hidden Layers", 
-            color='black', **font_style)
+    # Hidden Layers Label (centered horizontally over the hidden layers)
+    if len(layer_sizes) > 2:
+        hidden_center_x = h_spacing * (len(layer_sizes) - 1) / 2
+        ax.text(hidden_center_x, label_y_pos, "Hidden Layers", 
+                color='black', **font_style)
 
     # Output Layer Label (centered horizontally over the last layer)
-    ax.text(layers_coords[-1][0][0], label_y_pos, "Output Layer", 
+    ax.text(h_spacing * (len(layer_sizes) - 1), label_y_pos, "Output Layer", 
             color=layer_colors[-1], **font_style) 
 
     # 4. Final Plot Styling
@@ -97,15 +131,25 @@ def draw_mlp(layer_sizes, layer_colors):
     plt.axis('off')  # Turn off axis lines and labels
     # plt.title("Multilayer Perceptron Architecture", fontsize=15)
     plt.tight_layout()
-    plt.savefig("MLP_architecture.png", transparent = True, dpi = 300)
+    plt.savefig(output, transparent = True, dpi = 300)
     plt.show()
 
-# --- Configuration based on user request ---
-# Architecture: 4 Input, 8 Hidden, 6 Hidden, 1 Output
-mlp_layers = [3, 6, 4, 1]
-
-# Colors: Forestgreen (Input), Black (Hidden 1), Black (Hidden 2), Red (Output)
-mlp_colors = ['forestgreen', 'black', 'black', 'red']
+def draw_model(model, layer_colors, max_width=6.0, max_shown=10,
+               output="MLP_model.png"):
+    """
+    Draws a trained MLP (see MLP.py) with edge widths set by its weights.
+    It is saved to output, so the architecture figure is not overwritten.
+    """
+    draw_mlp(model.layer_sizes, layer_colors, weights=model.weights,
+             max_width=max_width, max_shown=max_shown, output=output)
 
-# Generate the plot
-draw_mlp(mlp_layers, mlp_colors)
\ No newline at end of file
+if __name__ == "__main__":
+    # --- Configuration based on user request ---
+    # Architecture: 4 Input, 8 Hidden, 6 Hidden, 1 Output
+    mlp_layers = [3, 6, 4, 1]
+    
+    # Colors: Forestgreen (Input), Black (Hidden 1), Black (Hidden 2), Red (Output)
+    mlp_colors = ['forestgreen', 'black', 'black', 'red']
+    
+    # Generate the plot
+    draw_mlp(mlp_layers, mlp_colors)
\ No newline at end of file
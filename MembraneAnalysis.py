@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:02:47 2026
+
+@author: alfonsocabezonvizoso
+"""
+
+import argparse
+import os
+import numpy as np
+from scipy.spatial import Voronoi
+from MembraneBuilder import TAIL_BEADS
+from PBC import image_shifts
+from StreamingPCA import iter_batches, map_batches
+
+# Lipid types of LipidBilayer.get_lipid_style, in the order results are reported
+LIPID_TYPES = ('PC', 'PS', 'PE', 'PG')
+
+
+def read_gro_topology(path : str):
+    '''
+    Lipid species, tail length and box of a bilayer written by
+    ``MembraneBuilder.write_gro`` (head bead first, then the beads of tail A
+    and tail B of every lipid).
+
+    Returns
+    -------
+    species, n_tail, box
+        (L,) species names, beads per tail and the (3,) box in nm.
+
+    '''
+    with open(path) as handle:
+        lines = handle.read().splitlines()
+    n_atoms = int(lines[1])
+    atoms = lines[2:2 + n_atoms]
+    resid = np.array([int(line[0:5]) for line in atoms])
+    # Residue numbers wrap at 100000, so a new lipid starts wherever they change
+    starts = np.flatnonzero(np.r_[True, resid[1:] != resid[:-1]])
+    if n_atoms % len(starts):
+        raise ValueError(f'{path}: lipids do not all have the same number of beads')
+    per_lipid = n_atoms // len(starts)
+    species = np.array([atoms[i][5:10].strip() for i in starts])
+    box = np.array([float(v) for v in lines[2 + n_atoms].split()[:3]])
+    return species, (per_lipid - 1) // 2, box
+
+
+def split_beads(frames, n_lipids : int, n_tail : int = TAIL_BEADS):
+    '''
+    Heads (F, L, 3) and tails (F, L, 2, n_tail, 3) of frames in the bead
+    order of ``MembraneBuilder`` (F frames of L * (1 + 2 * n_tail) beads).
+    '''
+    frames = np.asarray(frames, dtype=float)
+    per_lipid = 1 + 2 * n_tail
+    if frames.size != len(frames) * n_lipids * per_lipid * 3:
+        raise ValueError(f'Frames of {frames.size // max(len(frames), 1)} values do not match '
+                         f'{n_lipids} lipids of {per_lipid} beads')
+    beads = frames.reshape(len(frames), n_lipids, per_lipid, 3)
+    return beads[:, :, 0], beads[:, :, 1:].reshape(len(frames), n_lipids, 2, n_tail, 3)
+
+
+def _minimum_image(d, box):
+    # Orthorhombic boxes, broadcast against d (one box per frame is allowed)
+    return d - box * np.round(d / box)
+
+
+def assign_leaflets(heads, tails, box):
+    '''
+    Leaflet of every lipid from its orientation: 0 (upper) when the head
+    lies above the center of its tails along z, 1 (lower) otherwise. Using
+    minimum-image head-to-bead vectors makes the assignment independent of
+    where the bilayer sits in the box.
+
+    Parameters
+    ----------
+    heads : np.ndarray
+        Head positions, shape (..., L, 3).
+    tails : np.ndarray
+        Tail beads, shape (..., L, 2, n_tail, 3).
+    box : np.ndarray
+        (3,) box, or one box per frame with shape (..., 1, 3).
+
+    Returns
+    -------
+    np.ndarray
+        (..., L) int8 leaflet indices.
+
+    '''
+    d = _minimum_image(heads[..., None, None, :] - tails, box[..., None, None, :]).mean(axis=(-3, -2))
+    return np.where(d[..., 2] > 0, 0, 1).astype(np.int8)
+
+
+def voronoi_areas(xy, box, margin : float = None):
+    '''
+    Area of the periodic 2D Voronoi cell of every point.
+
+    Points are wrapped into the box and the images lying within ``margin``
+    of its edges are added, so every cell of the original points is closed
+    and periodic. Cell areas are summed over Voronoi ridges, each ridge
+    adding the triangle it forms with both points it separates, without a
+    Python loop over cells.
+
+    Parameters
+    ----------
+    xy : np.ndarray
+        (n, 2) positions.
+    box : np.ndarray
+        (2,) box lengths.
+    margin : float, optional
+        Width of the band of periodic images. The default is three mean
+        point spacings.
+
+    Returns
+    -------
+    np.ndarray
+        (n,) cell areas; they add up to the box area.
+
+    '''
+    box = np.asarray(box, dtype=float)
+    n = len(xy)
+    if margin is None:
+        margin = 3 * np.sqrt(np.prod(box) / n)
+    xy = np.asarray(xy, dtype=float) % box
+    shifts = image_shifts(box, 1)
+    shifts = shifts[np.any(shifts != 0, axis=1)]
+    images = (xy[None] + shifts[:, None]).reshape(-1, 2)
+    images = images[np.all((images > -margin) & (images < box + margin), axis=1)]
+    points = np.concatenate([xy, images])
+    vor = Voronoi(points)
+    ridge_points = vor.ridge_points
+    ridge_vertices = np.asarray(vor.ridge_vertices)
+    own = ridge_points.min(axis=1) < n
+    ridge_points, ridge_vertices = ridge_points[own], ridge_vertices[own]
+    if np.any(ridge_vertices < 0):
+        raise ValueError('Open Voronoi cell, increase the margin of periodic images')
+    v1, v2 = vor.vertices[ridge_vertices[:, 0]], vor.vertices[ridge_vertices[:, 1]]
+    areas = np.zeros(len(points))
+    for side in (0, 1):
+        p = points[ridge_points[:, side]]
+        a, b = v1 - p, v2 - p
+        areas += np.bincount(ridge_points[:, side], 0.5 * np.abs(a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]),
+                             minlength=len(points))
+    return areas[:n]
+
+
+def _per_frame(values, frame_index, groups, n_frames : int, n_groups : int):
+    # Sum of values per (frame, group), shape (n_frames, n_groups)
+    index = frame_index * n_groups + groups
+    return np.bincount(index.ravel(), np.broadcast_to(values, index.shape).ravel(),
+                       minlength=n_frames * n_groups).reshape(n_frames, n_groups)
+
+
+def _analyze_block(block, species_index, n_species : int, n_tail : int, grid : int):
+    '''
+    All observables of one block of frames. Per-frame results are small
+    (frames x leaflets x species); the thickness map and order parameters
+    come back as sums, so blocks can be reduced in any order.
+    '''
+    frames, boxes = block
+    n_lipids = len(species_index)
+    heads, tails = split_beads(frames, n_lipids, n_tail)
+    F = len(heads)
+    boxes = np.broadcast_to(np.asarray(boxes, dtype=float), (F, 3))
+    box = boxes[:, None, :]
+    frame_index = np.broadcast_to(np.arange(F)[:, None], (F, n_lipids))
+    species = np.broadcast_to(species_index, (F, n_lipids))
+
+    leaflet = assign_leaflets(heads, tails, box).astype(np.intp)
+    groups = leaflet * n_species + species
+    counts = _per_frame(1, frame_index, groups, F, 2 * n_species).reshape(F, 2, n_species).astype(int)
+    apl = (boxes[:, 0] * boxes[:, 1])[:, None] / counts.sum(axis=2)
+
+    # Voronoi cells of the heads of each leaflet, frame by frame
+    areas = np.full((F, n_lipids), np.nan)
+    for f in range(F):
+        for k in (0, 1):
+            mask = leaflet[f] == k
+            if mask.sum() >= 3:
+                areas[f, mask] = voronoi_areas(heads[f, mask, :2], boxes[f, :2])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        apl_species = (_per_frame(np.nan_to_num(areas), frame_index, groups, F, 2 * n_species)
+                       .reshape(F, 2, n_species) / counts)
+
+    # Head heights relative to the bilayer center, the circular mean of z
+    Lz = boxes[:, 2:3]
+    theta = 2 * np.pi * heads[..., 2] / Lz
+    center = np.arctan2(np.sin(theta).mean(axis=1), np.cos(theta).mean(axis=1))[:, None] * Lz / (2 * np.pi)
+    z = heads[..., 2] - center
+    z -= Lz * np.round(z / Lz)
+    z_sum = _per_frame(z, frame_index, leaflet, F, 2)
+    z_count = _per_frame(1, frame_index, leaflet, F, 2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        thickness = z_sum[:, 0] / z_count[:, 0] - z_sum[:, 1] / z_count[:, 1]
+
+    # Thickness map on a grid of fractional xy coordinates
+    s = (heads[..., :2] / box[..., :2]) % 1.0
+    cell = np.minimum((s * grid).astype(int), grid - 1)
+    cell = cell[..., 0] * grid + cell[..., 1]
+    bins = leaflet * grid * grid + cell
+    z_map = _per_frame(z, frame_index, bins, F, 2 * grid * grid).reshape(F, 2, grid * grid)
+    n_map = _per_frame(1, frame_index, bins, F, 2 * grid * grid).reshape(F, 2, grid * grid)
+    both = np.all(n_map > 0, axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        local = z_map[:, 0] / n_map[:, 0] - z_map[:, 1] / n_map[:, 1]
+    map_sum = np.where(both, local, 0).sum(axis=0)
+    map_count = both.sum(axis=0)
+
+    # Tail order parameters S = (3 cos^2 - 1) / 2 of every bond with z
+    bonds = _minimum_image(np.diff(tails, axis=3), box[:, :, None, None, :])
+    cos2 = bonds[..., 2] ** 2 / np.einsum('...i,...i->...', bonds, bonds)
+    order = (1.5 * cos2 - 0.5).mean(axis=2)                                 # (F, L, n_tail - 1)
+    order_sum = np.stack([np.bincount(species.ravel(), order[..., b].ravel(), minlength=n_species)
+                          for b in range(n_tail - 1)], axis=1)
+    order_count = np.bincount(species.ravel(), minlength=n_species)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        order_frames = (_per_frame(order.mean(axis=2), frame_index, species, F, n_species)
+                        / _per_frame(1, frame_index, species, F, n_species))
+
+    return {'leaflet_counts': counts, 'apl': apl, 'apl_species': apl_species,
+            'thickness': thickness, 'order_frames': order_frames,
+            'map_sum': map_sum, 'map_count': map_count,
+            'order_sum': order_sum, 'order_count': order_count,
+            'box_sum': boxes.sum(axis=0)}
+
+
+def _blocks(source, box, batch_size : int):
+    box = np.asarray(box, dtype=float)
+    first = 0
+    for frames in iter_batches(source, batch_size):
+        yield frames, box if box.ndim == 1 else box[first:first + len(frames)]
+        first += len(frames)
+
+
+def analyze_membrane(source, species, box, n_tail : int = TAIL_BEADS, grid : int = 20,
+                     batch_size : int = 100, n_jobs : int = 1):
+    '''
+    Streaming analysis of a flat bilayer trajectory: leaflet assignment,
+    area per lipid (periodic Voronoi of the heads of every leaflet),
+    thickness and a thickness map, and tail order parameters, split by lipid
+    species.
+
+    The trajectory is read once, in blocks of ``batch_size`` frames (see
+    ``StreamingPCA.iter_batches``) that are analyzed over ``n_jobs``
+    processes. Only per-frame summaries and running sums are kept, so memory
+    is bounded by the block size whatever the trajectory length.
+
+    Parameters
+    ----------
+    source : str, np.ndarray or iterable
+        Frames of L * (1 + 2 * n_tail) beads in the order of
+        ``MembraneBuilder`` (head, tail A, tail B of every lipid), in the
+        units of ``box``. The bilayer normal is z.
+    species : np.ndarray
+        (L,) species of every lipid, e.g. from ``read_gro_topology``.
+    box : np.ndarray
+        (3,) orthorhombic box, or (n_frames, 3) boxes.
+    n_tail : int, optional
+        Beads per tail. The default is TAIL_BEADS.
+    grid : int, optional
+        Bins along x and y of the thickness map. The default is 20.
+    batch_size : int, optional
+        Frames per block. The default is 100.
+    n_jobs : int, optional
+        Worker processes (None means os.cpu_count()). The default is 1.
+
+    Returns
+    -------
+    dict
+        ``species`` (S,) with the LIPID_TYPES present first, then
+        per frame: ``leaflet_counts`` (n_frames, 2, S), ``apl`` (n_frames, 2)
+        box area over lipids of each leaflet, ``apl_species`` (n_frames, 2, S)
+        mean Voronoi area, ``thickness`` (n_frames,) head-to-head distance
+        and ``order_frames`` (n_frames, S) mean tail order parameter; and
+        averaged over frames: ``thickness_map`` (grid, grid) indexed [x, y]
+        (NaN where a leaflet was never seen), ``order`` (S, n_tail - 1) per
+        bond from the head down and ``box`` the mean box.
+
+    '''
+    n_jobs = n_jobs or os.cpu_count()
+    species = np.asarray(species)
+    present = set(species.tolist())
+    names = [name for name in LIPID_TYPES if name in present] + sorted(present - set(LIPID_TYPES))
+    unique, inverse = np.unique(species, return_inverse=True)
+    species_index = np.array([names.index(name) for name in unique.tolist()])[inverse]
+
+    per_frame = {key: [] for key in ('leaflet_counts', 'apl', 'apl_species', 'thickness', 'order_frames')}
+    totals = {}
+    for result in map_batches(_analyze_block, _blocks(source, box, batch_size), n_jobs,
+                              species_index, len(names), n_tail, grid):
+        for key in per_frame:
+            per_frame[key].append(result[key])
+        for key in ('map_sum', 'map_count', 'order_sum', 'order_count', 'box_sum'):
+            totals[key] = totals.get(key, 0) + result[key]
+    if not totals:
+        raise ValueError('No frames to analyze')
+
+    output = {'species': np.array(names)}
+    output.update({key: np.concatenate(values) for key, values in per_frame.items()})
+    n_frames = len(output['apl'])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        output['thickness_map'] = (totals['map_sum'] / totals['map_count']).reshape(grid, grid)
+        output['order'] = totals['order_sum'] / totals['order_count'][:, None]
+    output['box'] = totals['box_sum'] / n_frames
+    return output
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Area per lipid, thickness and order parameters of bilayer trajectories')
+    parser.add_argument('-i', '--input', help='Trajectory (multi-frame .xyz or .npy of shape (n_frames, n_beads, 3))',
+                        action='store', type = str, required=True)
+    parser.add_argument('-t', '--topology', help='.gro file of the bilayer (species, tail length and box)',
+                        action='store', type = str, required=True)
+    parser.add_argument('-o', '--output', help='Results (.npz)',
+                        action='store', type = str, default='membrane_analysis.npz')
+    parser.add_argument('-g', '--grid', help='Bins along x and y of the thickness map',
+                        action='store', type = int, default=20)
+    parser.add_argument('-s', '--scale', help='Factor converting trajectory coordinates to nm (0.1 for Angstrom .xyz)',
+                        action='store', type = float, default=1.0)
+    parser.add_argument('-b', '--batch_size', help='Frames per block',
+                        action='store', type = int, default=100)
+    parser.add_argument('-j', '--n_jobs', help='Worker processes',
+                        action='store', type = int, default=1)
+    args = parser.parse_args()
+
+    species, n_tail, box = read_gro_topology(args.topology)
+    frames = (batch * args.scale for batch in iter_batches(args.input, args.batch_size))
+    result = analyze_membrane(frames, species, box, n_tail=n_tail, grid=args.grid,
+                              batch_size=args.batch_size, n_jobs=args.n_jobs)
+    np.savez(args.output, **result)
+    for k, name in enumerate(result['species']):
+        print(f'{name}: area per lipid {np.nanmean(result["apl_species"][:, :, k]):.3f} nm^2, '
+              f'order {np.round(result["order"][k], 3)}')
+    print(f'Thickness: {np.nanmean(result["thickness"]):.3f} nm')
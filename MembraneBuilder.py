@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:05:33 2026
+
+@author: alfonsocabezonvizoso
+"""
+
+import argparse
+import os
+import numpy as np
+from XYZTrajectory import write_xyz
+
+TAIL_BEADS = 4          # beads per tail
+BEAD_SPACING = 0.47     # nm between consecutive tail beads
+TAIL_SEPARATION = 0.5   # nm between the two tails of a lipid
+
+
+def sample_species(n : int, fractions : dict, rng=None):
+    '''
+    Lipid species of ``n`` lipids with exact counts.
+
+    Every species gets floor(n * fraction) lipids and the remaining ones go
+    to the largest fractional parts, so the counts always add up to ``n``
+    and differ from n * fraction by less than one. The result is shuffled
+    with ``rng``.
+
+    Parameters
+    ----------
+    n : int
+        Number of lipids.
+    fractions : dict
+        {species: fraction}; fractions are normalized.
+    rng : np.random.Generator or int, optional
+        Random generator or seed.
+
+    Returns
+    -------
+    np.ndarray
+        Species name of every lipid.
+
+    '''
+    rng = np.random.default_rng(rng)
+    names = list(fractions)
+    weights = np.array([fractions[name] for name in names], dtype=float)
+    if np.any(weights < 0) or weights.sum() <= 0:
+        raise ValueError(f'Invalid composition {fractions}')
+    exact = n * weights / weights.sum()
+    counts = np.floor(exact).astype(int)
+    remainder = n - counts.sum()
+    counts[np.argsort(counts - exact, kind='stable')[:remainder]] += 1
+    return rng.permutation(np.repeat(np.array(names), counts))
+
+
+def _lattice(n : int, box_xy, shift : float = 0.0):
+    '''
+    ``n`` points covering a rectangle without gaps: rows as close to square
+    spacing as the box allows, with lipid counts differing by at most one,
+    each row evenly spread over the full width. ``shift`` moves the lattice
+    by that fraction of a spacing along x and y (0.5 staggers a leaflet).
+    '''
+    Lx, Ly = box_xy
+    ny = min(n, max(1, int(round(np.sqrt(n * Ly / Lx)))))
+    per_row = np.full(ny, n // ny)
+    per_row[:n % ny] += 1
+    row = np.repeat(np.arange(ny), per_row)
+    col = np.arange(n) - np.repeat(np.cumsum(per_row) - per_row, per_row)
+    x = (col + 0.5 + shift) * Lx / per_row[row]
+    y = (row + 0.5 + shift) * Ly / ny
+    return np.stack([x, y], axis=1) % np.asarray(box_xy, dtype=float)
+
+
+def flat_geometry(n_lipids, area_per_lipid : float = 0.65, thickness : float = 4.0):
+    '''
+    Head positions and normals of a flat bilayer in the xy plane.
+
+    The box is square with area n * area_per_lipid for the larger leaflet.
+    Every leaflet is spread over the whole box (see ``_lattice``), so there
+    are no empty sites; a smaller leaflet gets a proportionally larger area
+    per lipid. The lower leaflet is staggered by half a spacing.
+
+    Parameters
+    ----------
+    n_lipids : int or (int, int)
+        Lipids per leaflet, or (upper, lower).
+    area_per_lipid : float, optional
+        Area per lipid in nm^2 of the larger leaflet. The default is 0.65.
+    thickness : float, optional
+        Head-to-head distance in nm. The default is 4.0.
+
+    Returns
+    -------
+    heads, normals, leaflet, box
+        (L, 3) positions, (L, 3) unit normals pointing away from the tails,
+        (L,) leaflet index (0 upper, 1 lower) and the (3,) box in nm.
+
+    '''
+    counts = np.broadcast_to(np.asarray(n_lipids, dtype=int), 2)
+    side = np.sqrt(counts.max() * area_per_lipid)
+    box = np.array([side, side, thickness + 2 * (TAIL_BEADS * BEAD_SPACING + 1.0)])
+    heads, normals, leaflet = [], [], []
+    for k, (n, sign) in enumerate(zip(counts, (1, -1))):
+        xy = _lattice(n, box[:2], shift=0.5 * k)
+        z = np.full((n, 1), box[2] / 2 + sign * thickness / 2)
+        heads.append(np.hstack([xy, z]))
+        normals.append(np.tile([0.0, 0.0, sign], (n, 1)))
+        leaflet.append(np.full(n, k, dtype=np.int8))
+    return np.concatenate(heads), np.concatenate(normals), np.concatenate(leaflet), box
+
+
+def _fibonacci_sphere(n : int):
+    '''
+    ``n`` nearly uniform unit vectors (golden-angle spiral).
+    '''
+    i = np.arange(n) + 0.5
+    z = 1 - 2 * i / n
+    r = np.sqrt(1 - z ** 2)
+    phi = np.pi * (3 - np.sqrt(5)) * i
+    return np.stack([r * np.cos(phi), r * np.sin(phi), z], axis=1)
+
+
+def vesicle_geometry(radius : float, area_per_lipid : float = 0.65, thickness : float = 4.0):
+    '''
+    Head positions and normals of a spherical vesicle with outer head radius
+    ``radius`` (nm). Each leaflet gets as many lipids as fit its sphere at
+    ``area_per_lipid``. Outer heads face the solvent and inner heads the
+    lumen. Returns the same arrays as ``flat_geometry`` (leaflet 0 outer,
+    1 inner), with the vesicle centered in its box.
+    '''
+    margin = 2.0
+    box = np.full(3, 2 * (radius + margin))
+    heads, normals, leaflet = [], [], []
+    for k, (r, sign) in enumerate(zip((radius, radius - thickness), (1, -1))):
+        n = int(round(4 * np.pi * r ** 2 / area_per_lipid))
+        u = _fibonacci_sphere(n)
+        heads.append(box / 2 + r * u)
+        normals.append(sign * u)
+        leaflet.append(np.full(n, k, dtype=np.int8))
+    return np.concatenate(heads), np.concatenate(normals), np.concatenate(leaflet), box
+
+
+def ring_geometry(n_lipids, radius : float = 15.0, gap : float = 5.5, rotation=(0.0, 0.0)):
+    '''
+    Cross-section of a vesicle in the xy plane: lipids evenly spaced on two
+    concentric circles (outer head radius ``radius``, inner ``radius - gap``).
+    This is the geometry of the 2D membrane figure.
+
+    Parameters
+    ----------
+    n_lipids : (int, int)
+        Lipids on the outer and inner circle.
+    rotation : (float, float), optional
+        Rotation of each circle in degrees, to stagger the leaflets.
+
+    Returns
+    -------
+    heads, normals, leaflet, box
+        As ``flat_geometry``, centered on the origin with z = 0.
+
+    '''
+    heads, normals, leaflet = [], [], []
+    for k, (n, r, rot, sign) in enumerate(zip(n_lipids, (radius, radius - gap), rotation, (1, -1))):
+        theta = np.linspace(0, 2 * np.pi, n, endpoint=False) + np.radians(rot)
+        u = np.stack([np.cos(theta), np.sin(theta), np.zeros(n)], axis=1)
+        heads.append(r * u)
+        normals.append(sign * u)
+        leaflet.append(np.full(n, k, dtype=np.int8))
+    box = np.array([2 * radius, 2 * radius, 0.0])
+    return np.concatenate(heads), np.concatenate(normals), np.concatenate(leaflet), box
+
+
+def tail_coordinates(heads, normals, n_beads : int = TAIL_BEADS,
+                     spacing : float = BEAD_SPACING, separation : float = TAIL_SEPARATION):
+    '''
+    Straight double tails for every lipid, built by broadcasting one bead
+    template against all heads at once.
+
+    The tails run from the head along -normal and are split along a tangent
+    perpendicular to the normal (in the xy plane when possible, so the 2D
+    ring keeps its tails in the plane).
+
+    Returns
+    -------
+    np.ndarray
+        Tail bead coordinates, shape (L, 2, n_beads, 3).
+
+    '''
+    heads = np.asarray(heads, dtype=float)
+    normals = np.asarray(normals, dtype=float)
+    # Tangent: normal x z, or x for normals along z
+    tangent = np.cross(normals, [0.0, 0.0, 1.0])
+    along_z = np.linalg.norm(tangent, axis=1) < 1e-8
+    tangent[along_z] = [1.0, 0.0, 0.0]
+    tangent /= np.linalg.norm(tangent, axis=1, keepdims=True)
+    depth = spacing * np.arange(1, n_beads + 1)                    # (B,)
+    side = separation / 2 * np.array([-1.0, 1.0])                   # (2,)
+    return (heads[:, None, None, :]
+            - depth[None, None, :, None] * normals[:, None, None, :]
+            + side[None, :, None, None] * tangent[:, None, None, :])
+
+
+def build_membrane(geometry : str = 'flat', composition=None, seed=None, **kwargs):
+    '''
+    Build a bilayer and its lipid composition.
+
+    Parameters
+    ----------
+    geometry : str, optional
+        'flat', 'vesicle' or 'ring'; ``kwargs`` go to the matching
+        ``*_geometry`` function. The default is 'flat'.
+    composition : dict or (dict, dict), optional
+        {species: fraction} for both leaflets, or one dict per leaflet
+        (upper/outer first). The default is pure PC.
+    seed : int, optional
+        Seed of the species sampling.
+
+    Returns
+    -------
+    dict
+        ``species`` (L,), ``leaflet`` (L,) int8, ``heads`` (L, 3),
+        ``normals`` (L, 3), ``tails`` (L, 2, n_beads, 3) and ``box`` (3,),
+        lengths in nm.
+
+    '''
+    geometries = {'flat': flat_geometry, 'vesicle': vesicle_geometry, 'ring': ring_geometry}
+    if geometry not in geometries:
+        raise ValueError(f'Unknown geometry {geometry!r}, use one of {sorted(geometries)}')
+    heads, normals, leaflet, box = geometries[geometry](**kwargs)
+    if composition is None:
+        composition = {'PC': 1.0}
+    if isinstance(composition, dict):
+        composition = (composition, composition)
+    rng = np.random.default_rng(seed)
+    species = np.empty(len(heads), dtype='<U4')
+    for k, fractions in enumerate(composition):
+        mask = leaflet == k
+        species[mask] = sample_species(int(mask.sum()), fractions, rng)
+    return {'species': species, 'leaflet': leaflet, 'heads': heads, 'normals': normals,
+            'tails': tail_coordinates(heads, normals), 'box': box}
+
+
+def _beads(membrane : dict):
+    '''
+    Bead coordinates (L * n_beads, 3), bead names and residue index of
+    every bead, head first then tail A and tail B of each lipid.
+    '''
+    tails = membrane['tails']
+    n_lipids, _, n_tail, _ = tails.shape
+    coords = np.concatenate([membrane['heads'][:, None, :],
+                             tails.reshape(n_lipids, 2 * n_tail, 3)], axis=1)
+    names = ['HD'] + [f'T{i + 1}{t}' for t in 'AB' for i in range(n_tail)]
+    per_lipid = len(names)
+    return (coords.reshape(-1, 3), names * n_lipids,
+            np.repeat(np.arange(n_lipids), per_lipid), per_lipid)
+
+
+def write_gro(path : str, membrane : dict, title : str = 'Lipid bilayer'):
+    '''
+    Write a membrane to a GROMACS .gro file (nm).
+    '''
+    coords, names, residue, _ = _beads(membrane)
+    species = membrane['species'][residue]
+    lines = ['%5d%-5s%5s%5d%8.3f%8.3f%8.3f' % (r % 100000, s, a, i % 100000, x, y, z)
+             for i, (r, s, a, (x, y, z)) in enumerate(zip((residue + 1).tolist(), species.tolist(),
+                                                         names, coords.tolist()), start=1)]
+    box = membrane['box']
+    with open(path, 'w') as handle:
+        handle.write(f'{title}\n{len(lines)}\n')
+        handle.write('\n'.join(lines))
+        handle.write('\n%10.5f%10.5f%10.5f\n' % tuple(box))
+
+
+def write_pdb(path : str, membrane : dict):
+    '''
+    Write a membrane to a PDB file (Angstrom). Atom serials and residue
+    numbers wrap at the format's limits.
+    '''
+    coords, names, residue, _ = _beads(membrane)
+    species = membrane['species'][residue]
+    coords = 10 * coords
+    elements = ['P' if a == 'HD' else 'C' for a in names]
+    lines = ['ATOM  %5d %-4s %-4sA%4d    %8.3f%8.3f%8.3f  1.00  0.00          %2s'
+             % (i % 100000, a, s, r % 10000, x, y, z, e)
+             for i, (r, s, a, e, (x, y, z)) in enumerate(zip((residue + 1).tolist(), species.tolist(),
+                                                            names, elements, coords.tolist()), start=1)]
+    a, b, c = 10 * membrane['box']
+    with open(path, 'w') as handle:
+        handle.write('CRYST1%9.3f%9.3f%9.3f  90.00  90.00  90.00 P 1           1\n' % (a, b, c))
+        handle.write('\n'.join(lines))
+        handle.write('\nEND\n')
+
+
+def write_membrane(path : str, membrane : dict):
+    '''
+    Write a membrane to .gro, .pdb or .xyz (Angstrom, heads as P and tail
+    beads as C), chosen by the extension of ``path``.
+    '''
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.gro':
+        write_gro(path, membrane)
+    elif ext == '.pdb':
+        write_pdb(path, membrane)
+    elif ext == '.xyz':
+        coords, names, _, _ = _beads(membrane)
+        write_xyz(path, 10 * coords, ['P' if a == 'HD' else 'C' for a in names],
+                  f'{len(membrane["species"])} lipids')
+    else:
+        raise ValueError(f'Unknown format {ext!r}, use .gro, .pdb or .xyz')
+
+
+def _parse_composition(text : str):
+    '''
+    'PC:0.8,PE:0.2' -> {'PC': 0.8, 'PE': 0.2}
+    '''
+    return {name: float(value) for name, value in
+            (item.split(':') for item in text.split(','))}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Build flat or vesicle lipid bilayers')
+    parser.add_argument('-g', '--geometry', help='flat or vesicle',
+                        action='store', type = str, default='flat')
+    parser.add_argument('-n', '--n_lipids', help='Lipids per leaflet (flat)',
+                        action='store', type = int, default=1000)
+    parser.add_argument('-r', '--radius', help='Outer head radius in nm (vesicle)',
+                        action='store', type = float, default=20.0)
+    parser.add_argument('--outer', help='Upper/outer leaflet composition, e.g. PC:0.8,PE:0.2',
+                        action='store', type = str, default='PC:1')
+    parser.add_argument('--inner', help='Lower/inner leaflet composition (default: same as --outer)',
+                        action='store', type = str, default=None)
+    parser.add_argument('--apl', help='Area per lipid (nm^2)',
+                        action='store', type = float, default=0.65)
+    parser.add_argument('-s', '--seed', help='Seed of the composition sampling',
+                        action='store', type = int, default=0)
+    parser.add_argument('-o', '--output', help='Output file (.gro, .pdb or .xyz)',
+                        action='store', type = str, default='membrane.gro')
+    args = parser.parse_args()
+
+    composition = (_parse_composition(args.outer),
+                   _parse_composition(args.inner or args.outer))
+    if args.geometry == 'vesicle':
+        geometry = {'radius': args.radius}
+    else:
+        geometry = {'n_lipids': args.n_lipids}
+    membrane = build_membrane(args.geometry, composition, seed=args.seed,
+                              area_per_lipid=args.apl, **geometry)
+    write_membrane(args.output, membrane)
+    print(f'{len(membrane["species"])} lipids written to {args.output}')
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:12:41 2026
+
+@author: alfonsocabezonvizoso
+"""
+
+import itertools
+import os
+from collections import namedtuple
+import numpy as np
+
+
+HillsChunk = namedtuple('HillsChunk', ['time', 'centers', 'sigmas', 'heights', 'biasf'])
+
+
+def iter_hills(path : str, chunk_size : int = 100000, skip : int = 0):
+    '''
+    Stream a PLUMED HILLS file in chunks of at most ``chunk_size`` hills.
+
+    Only ``chunk_size`` lines are held in memory at a time, so arbitrarily
+    large files can be folded into a bias grid. The column layout is taken
+    from the ``#! FIELDS`` header; ``#!`` lines repeated by restarted runs
+    are skipped.
+
+    Parameters
+    ----------
+    path : str
+        Path to the HILLS file.
+    chunk_size : int, optional
+        Maximum number of hills per chunk. The default is 100000.
+    skip : int, optional
+        Number of hills to skip at the start of the file, e.g. to resume
+        from a checkpoint. The default is 0.
+
+    Yields
+    ------
+    HillsChunk
+        Named tuple with ``time`` (n,), ``centers`` (n, n_cv), ``sigmas``
+        (n, n_cv), ``heights`` (n,) and ``biasf`` (n,) arrays. ``biasf`` is
+        1 for hills written without a bias factor.
+
+    '''
+    with open(path) as handle:
+        fields = None
+        for line in handle:
+            if line.startswith('#! FIELDS'):
+                fields = line.split()[2:]
+                break
+        if fields is None:
+            raise ValueError(f'{path} has no "#! FIELDS" header')
+        sigma_cols = [i for i, f in enumerate(fields) if f.startswith('sigma_')]
+        n_cv = len(sigma_cols)
+        if n_cv == 0 or 'height' not in fields:
+            raise ValueError(f'Unsupported HILLS layout in {path}: {fields}')
+        cv_cols = [fields.index(fields[i][len('sigma_'):]) for i in sigma_cols]
+        height_col = fields.index('height')
+        biasf_col = fields.index('biasf') if 'biasf' in fields else None
+
+        rows = (line for line in handle if line.strip() and not line.startswith('#'))
+        rows = itertools.islice(rows, skip, None)
+        while True:
+            lines = list(itertools.islice(rows, chunk_size))
+            if not lines:
+                return
+            data = np.loadtxt(lines, ndmin=2)
+            biasf = data[:, biasf_col] if biasf_col is not None else np.ones(len(data))
+            yield HillsChunk(data[:, 0], data[:, cv_cols], data[:, sigma_cols],
+                             data[:, height_col], biasf)
+
+
+def sum_hills(axes, centers, heights, sigmas, cutoff : float = None,
+              gradient : bool = False, max_bytes : int = 2**26):
+    '''
+    Sum a batch of Gaussian hills on a regular N-dimensional grid.
+
+    The Gaussians are separable, so every chunk of hills is reduced to one
+    (n_chunk, n_bins) factor per collective variable and contracted with a
+    single matrix product. The chunk size is chosen so that the largest
+    temporary array stays below ``max_bytes``.
+
+    Parameters
+    ----------
+    axes : sequence of np.ndarray
+        Grid points along each collective variable.
+    centers : np.ndarray
+        Hill centers with shape (n_hills, n_cv).
+    heights : np.ndarray
+        Hill heights with shape (n_hills,).
+    sigmas : float or np.ndarray
+        Hill widths, broadcastable to (n_hills, n_cv).
+    cutoff : float, optional
+        If given, every Gaussian is set to zero beyond ``cutoff`` widths of
+        its center along any collective variable.
+    gradient : bool, optional
+        Also return the derivative of the bias along each collective
+        variable. The default is False.
+    max_bytes : int, optional
+        Memory budget for the temporaries of one chunk. The default is 64 MB.
+
+    Returns
+    -------
+    V : np.ndarray
+        Summed bias with shape (len(axes[0]), ..., len(axes[-1])).
+    dV : np.ndarray
+        Only if ``gradient`` is True. Derivatives with shape V.shape + (n_cv,).
+
+    '''
+    axes = [np.asarray(a, dtype=float) for a in axes]
+    n_cv = len(axes)
+    shape = tuple(len(a) for a in axes)
+    centers = np.asarray(centers, dtype=float).reshape(-1, n_cv)
+    heights = np.broadcast_to(np.asarray(heights, dtype=float), len(centers))
+    sigmas = np.broadcast_to(np.asarray(sigmas, dtype=float), centers.shape)
+
+    # The widest temporary is the Khatri-Rao product of all but the last factor
+    row_size = max(int(np.prod(shape[:-1])), sum(shape))
+    chunk = max(1, max_bytes // (8 * row_size))
+
+    V = np.zeros(shape)
+    dV = np.zeros(shape + (n_cv,)) if gradient else None
+    for start in range(0, len(centers), chunk):
+        c = centers[start:start + chunk]
+        s = sigmas[start:start + chunk]
+        h = heights[start:start + chunk]
+        factors, slopes = [], []
+        for d, a in enumerate(axes):
+            u = (a[None, :] - c[:, d, None]) / s[:, d, None]
+            f = np.exp(-0.5 * u ** 2)
+            if cutoff is not None:
+                f[np.abs(u) > cutoff] = 0.0
+            factors.append(f)
+            if gradient:
+                slopes.append(-f * u / s[:, d, None])
+        factors[0] = factors[0] * h[:, None]
+        V += _contract(factors).reshape(shape)
+        if gradient:
+            for d in range(n_cv):
+                terms = list(factors)
+                terms[d] = slopes[d] * h[:, None] if d == 0 else slopes[d]
+                dV[..., d] += _contract(terms).reshape(shape)
+    if gradient:
+        return V, dV
+    return V
+
+
+def _contract(factors):
+    '''
+    Sum over hills of the outer product of per-dimension factors, i.e.
+    out[a, b, ...] = sum_h f0[h, a] * f1[h, b] * ...
+    '''
+    rows = factors[0]
+    for f in factors[1:-1]:
+        rows = (rows[:, :, None] * f[:, None, :]).reshape(len(f), -1)
+    if len(factors) == 1:
+        return rows.sum(axis=0)
+    return rows.T @ factors[-1]
+
+
+class GridBias:
+    '''
+    Metadynamics bias potential stored on a regular grid.
+
+    Every deposited Gaussian is added only to the bins that lie within
+    ``cutoff`` widths of its center, so the cost of a deposition does not
+    depend on the total number of bins. The bias V and its gradient are
+    accumulated side by side and read back by (multi)linear interpolation,
+    which makes a lookup independent of the number of hills already
+    deposited.
+
+    Parameters
+    ----------
+    lower : float or sequence of float
+        Lower bound of the grid along each collective variable.
+    upper : float or sequence of float
+        Upper bound of the grid along each collective variable.
+    n_bins : int or sequence of int
+        Number of grid points along each collective variable.
+    sigma : float or sequence of float
+        Default Gaussian width used when ``deposit`` is called without one.
+    cutoff : float, optional
+        Gaussians are truncated beyond ``cutoff * sigma``. The default is 4.0.
+    biasfactor : float, optional
+        Bias factor of well-tempered metadynamics. If given, ``deposit``
+        scales every hill by exp(-V(s) / (kT * (biasfactor - 1))).
+    kT : float, optional
+        Thermal energy in the units of the bias. Required for well-tempered
+        deposition. The default is None.
+
+    '''
+
+    def __init__(self, lower, upper, n_bins, sigma, cutoff : float = 4.0,
+                 biasfactor : float = None, kT : float = None):
+        self.lower = np.atleast_1d(np.asarray(lower, dtype=float))
+        upper = np.broadcast_to(np.asarray(upper, dtype=float), self.lower.shape)
+        n_bins = np.broadcast_to(np.asarray(n_bins, dtype=int), self.lower.shape)
+        self.ndim = len(self.lower)
+        self.axes = [np.linspace(lo, hi, n)
+                     for lo, hi, n in zip(self.lower, upper, n_bins)]
+        self.shape = tuple(int(n) for n in n_bins)
+        self.dx = np.array([a[1] - a[0] for a in self.axes])
+        self.sigma = np.broadcast_to(np.asarray(sigma, dtype=float),
+                                     self.lower.shape).copy()
+        self.cutoff = float(cutoff)
+        self.V = np.zeros(self.shape)
+        self.dV = np.zeros(self.shape + (self.ndim,))
+        self.biasfactor = biasfactor
+        self.kT = kT
+        self.n_hills = 0
+
+    def deposit(self, center, height : float, sigma=None):
+        '''
+        Add one Gaussian hill to the grid.
+
+        Parameters
+        ----------
+        center : float or sequence of float
+            Position of the hill on the collective variables.
+        height : float
+            Initial height of the hill. In well-tempered mode it is scaled
+            down by the bias already present at ``center``.
+        sigma : float or sequence of float, optional
+            Width of the hill. Defaults to the width given at construction.
+
+        Returns
+        -------
+        None.
+
+        '''
+        center = np.broadcast_to(np.asarray(center, dtype=float), self.lower.shape)
+        if self.biasfactor is not None:
+            if self.kT is None:
+                raise ValueError('Well-tempered deposition needs kT')
+            height = height * np.exp(-self.value(center if self.ndim > 1 else center[0])
+                                     / (self.kT * (self.biasfactor - 1)))
+        sigma = self.sigma if sigma is None else np.broadcast_to(
+            np.asarray(sigma, dtype=float), self.lower.shape)
+        self.n_hills += 1
+        window, factors, slopes = [], [], []
+        for d in range(self.ndim):
+            reach = self.cutoff * sigma[d]
+            i_lo = max(int(np.ceil((center[d] - reach - self.lower[d]) / self.dx[d])), 0)
+            i_hi = min(int(np.floor((center[d] + reach - self.lower[d]) / self.dx[d])) + 1,
+                       self.shape[d])
+            if i_lo >= i_hi:
+                return
+            dist = self.axes[d][i_lo:i_hi] - center[d]
+            window.append(slice(i_lo, i_hi))
+            factors.append(np.exp(-0.5 * (dist / sigma[d]) ** 2))
+            slopes.append(-dist / sigma[d] ** 2)
+        window = tuple(window)
+        gauss = height * _outer(factors)
+        self.V[window] += gauss
+        local_dV = self.dV[window]
+        for d in range(self.ndim):
+            local_dV[..., d] += gauss * _along(slopes[d], d, self.ndim)
+
+    def deposit_batch(self, centers, heights, sigmas=None, max_bytes : int = 2**26):
+        '''
+        Add many Gaussian hills at once with ``sum_hills``. The heights are
+        used as given, also in well-tempered mode.
+
+        Parameters
+        ----------
+        centers : np.ndarray
+            Hill centers with shape (n_hills, n_cv).
+        heights : np.ndarray
+            Hill heights with shape (n_hills,).
+        sigmas : np.ndarray, optional
+            Hill widths, broadcastable to (n_hills, n_cv). Defaults to the
+            width given at construction.
+        max_bytes : int, optional
+            Memory budget passed to ``sum_hills``.
+
+        Returns
+        -------
+        None.
+
+        '''
+        centers = np.asarray(centers, dtype=float).reshape(-1, self.ndim)
+        sigmas = self.sigma if sigmas is None else sigmas
+        V, dV = sum_hills(self.axes, centers, heights, sigmas, cutoff=self.cutoff,
+                          gradient=True, max_bytes=max_bytes)
+        self.V += V
+        self.dV += dV
+        self.n_hills += len(centers)
+
+    def load_hills(self, path : str, chunk_size : int = 100000, skip : int = 0,
+                   checkpoint : str = None):
+        '''
+        Fold a PLUMED HILLS file into the grid chunk by chunk.
+
+        Well-tempered hills are written by PLUMED with heights multiplied by
+        biasf / (biasf - 1); this factor is removed before deposition so
+        that ``V`` holds the actual bias. If the grid has no bias factor yet
+        it is taken from the file.
+
+        Parameters
+        ----------
+        path : str
+            Path to the HILLS file.
+        chunk_size : int, optional
+            Number of hills read and deposited at once. The default is 100000.
+        skip : int, optional
+            Number of hills to skip at the start of the file. The default is 0.
+        checkpoint : str, optional
+            If given, the grid is saved to this ``.npz`` file after every chunk.
+
+        Returns
+        -------
+        None.
+
+        '''
+        for chunk in iter_hills(path, chunk_size=chunk_size, skip=skip):
+            heights = chunk.heights.copy()
+            tempered = chunk.biasf > 1
+            heights[tempered] *= (chunk.biasf[tempered] - 1) / chunk.biasf[tempered]
+            if self.biasfactor is None and tempered.any():
+                self.biasfactor = float(chunk.biasf[tempered][-1])
+            self.deposit_batch(chunk.centers, heights, chunk.sigmas)
+            if checkpoint is not None:
+                self.save(checkpoint)
+
+    def free_energy(self):
+        '''
+        Free-energy estimate on the grid, shifted so that its minimum is 0.
+        In well-tempered mode the bias is rescaled by biasfactor / (biasfactor - 1).
+        '''
+        F = -self.V
+        if self.biasfactor is not None:
+            F = F * self.biasfactor / (self.biasfactor - 1)
+        return F - F.min()
+
+    def save(self, path : str):
+        '''
+        Write the grid, bias and free energy to an ``.npz`` file. The file is
+        replaced atomically so an interrupted run leaves the last checkpoint
+        intact.
+        '''
+        tmp = f'{path}.tmp.npz'
+        np.savez(tmp, lower=self.lower, upper=[a[-1] for a in self.axes],
+                 shape=self.shape, sigma=self.sigma, cutoff=self.cutoff,
+                 biasfactor=np.nan if self.biasfactor is None else self.biasfactor,
+                 kT=np.nan if self.kT is None else self.kT,
+                 n_hills=self.n_hills, V=self.V, dV=self.dV, F=self.free_energy())
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path : str):
+        '''
+        Restore a grid written by ``save``.
+        '''
+        with np.load(path) as data:
+            biasfactor = float(data['biasfactor'])
+            kT = float(data['kT'])
+            bias = cls(data['lower'], data['upper'], data['shape'], data['sigma'],
+                       cutoff=float(data['cutoff']),
+                       biasfactor=None if np.isnan(biasfactor) else biasfactor,
+                       kT=None if np.isnan(kT) else kT)
+            bias.V[...] = data['V']
+            bias.dV[...] = data['dV']
+            bias.n_hills = int(data['n_hills'])
+        return bias
+
+    def _interpolate(self, table : np.ndarray, x):
+        '''
+        Multilinearly interpolate ``table`` at ``x`` with a direct index
+        lookup. Points outside the grid take the value of the closest edge.
+        For a one-dimensional grid ``x`` may be a scalar or any array of
+        positions, otherwise its last axis runs over the collective variables.
+        '''
+        x = np.asarray(x, dtype=float)
+        if self.ndim == 1:
+            x = x[..., None]
+        n = np.array(self.shape)
+        u = np.clip((x - self.lower) / self.dx, 0, n - 1)
+        i = np.minimum(u.astype(np.intp), np.maximum(n - 2, 0))
+        frac = u - i
+        out = 0.0
+        for corner in itertools.product((0, 1), repeat=self.ndim):
+            corner = np.array(corner)
+            weight = np.prod(np.where(corner, frac, 1 - frac), axis=-1)
+            idx = tuple(np.moveaxis(i + corner, -1, 0))
+            value = table[idx]
+            if value.ndim > weight.ndim:
+                weight = weight[..., None]
+            out = out + weight * value
+        return out
+
+    def value(self, x):
+        '''
+        Bias potential V at one or several points.
+        '''
+        return self._interpolate(self.V, x)
+
+    def gradient(self, x):
+        '''
+        Gradient of the bias at one or several points. For a one-dimensional
+        grid this is dV/dx with the same shape as ``x``.
+        '''
+        grad = self._interpolate(self.dV, x)
+        if self.ndim == 1:
+            return grad[..., 0]
+        return grad
+
+
+def _outer(factors):
+    '''
+    Outer product of a list of 1D arrays.
+    '''
+    out = factors[0]
+    for f in factors[1:]:
+        out = np.multiply.outer(out, f)
+    return out
+
+
+def _along(values, axis : int, ndim : int):
+    '''
+    Reshape a 1D array so that it broadcasts along ``axis`` of an
+    ``ndim``-dimensional array.
+    '''
+    shape = [1] * ndim
+    shape[axis] = len(values)
+    return values.reshape(shape)
+
+
+def deposit_snapshots(bias : GridBias, centers, height : float, stride : int = 1,
+                      sigma=None):
+    '''
+    Deposit hills one by one and record the bias every ``stride`` hills.
+
+    The snapshots are written into a single array allocated up front, so
+    memory grows with the number of snapshots rather than with the number
+    of hills. The bias after the last hill is always recorded.
+
+    Parameters
+    ----------
+    bias : GridBias
+        Grid the hills are deposited on.
+    centers : np.ndarray
+        Hill centers, shape (n_hills,) for one CV or (n_hills, n_cv).
+    height : float
+        Hill height passed to ``GridBias.deposit``.
+    stride : int, optional
+        Number of hills between snapshots. The default is 1.
+    sigma : float or sequence of float, optional
+        Hill width passed to ``GridBias.deposit``.
+
+    Returns
+    -------
+    snapshots : np.ndarray
+        Array with shape (ceil(n_hills / stride),) + bias.shape.
+
+    '''
+    n_hills = len(centers)
+    n_snap = -(-n_hills // stride)
+    snapshots = np.empty((n_snap,) + bias.shape)
+    for k, center in enumerate(centers):
+        bias.deposit(center, height, sigma)
+        if (k + 1) % stride == 0 or k == n_hills - 1:
+            snapshots[k // stride] = bias.V
+    return snapshots
@@ -8,13 +8,11 @@ Created on Fri Jul 25 11:07:27 2025
 
 
 from rdkit import Chem
-from rdkit.Chem import AllChem
-from rdkit.Chem import Draw
 import sys
-import networkx as nx
-import graphein.molecule as gm
 import argparse
-import matplotlib.pyplot as plt
+from Conformers import embed_smiles, run_batch
+from MolGraph import mol_to_graph, to_networkx
+from GraphLayout import layout_2d
 
 # =============================================================================
 '''Define user inputs'''
@@ -23,12 +21,24 @@ parser.add_argument('-s', '--smile', help='Smile of the molecule',
                     action='store', type = str, default='O=C(N(C1=O)C)N(C2=C1N(C=N2)C)C')
 parser.add_argument('-n', '--name', help='Name for the molecule',
                     action='store', type = str, default="caffeine")
+parser.add_argument('-i', '--input', help='File with one SMILE per line ("-" for stdin). Enables batch mode',
+                    action='store', type = str, default=None)
+parser.add_argument('-o', '--output', help='Batch output, multi-frame .xyz or compact .npz',
+                    action='store', type = str, default='conformers.xyz')
+parser.add_argument('-j', '--n_jobs', help='Worker processes for batch mode',
+                    action='store', type = int, default=None)
+parser.add_argument('--chunk_size', help='Molecules per work unit in batch mode',
+                    action='store', type = int, default=64)
+parser.add_argument('--min_dist', help='Minimum distance between drawn atoms (Angstrom)',
+                    action='store', type = float, default=1.0)
+parser.add_argument('-c', '--cache', help='Directory of the conformer cache',
+                    action='store', type = str, default=None)
 args = parser.parse_args()
 # =============================================================================
 
 atom_color = {'C' : 'black', 'O' : 'red', 'N' : 'blue', 'H' : 'gray'}
 
-def smi2xyz(smi : str, name : str):
+def smi2xyz(smi : str, name : str, cache : str = None):
     '''
     This function takes the smile of a molecule and creates an xyz file.
 
@@ -40,49 +50,41 @@ def smi2xyz(smi : str, name : str):
     name : str
         Name for the molecule
 
+    cache : str, optional
+        Directory of the conformer cache. Cached conformers skip embedding.
+
     Returns
     -------
     None.
 
     '''
-    mol = Chem.MolFromSmiles(smi)
-    mol = Chem.AddHs(mol)
-    params = AllChem.ETKDG()
-    params.randomSeed = 0  # or any fixed integer
-    AllChem.EmbedMolecule(mol, params)
-    # AllChem.EmbedMolecule(mol)
-    AllChem.UFFOptimizeMolecule(mol)
+    mol = embed_smiles(smi, random_seed=0, cache=cache)
     Chem.rdmolfiles.MolToXYZFile(mol, f'{name}.xyz')
     return mol
 
-mol = smi2xyz(args.smile, args.name)
+if args.input is not None:
+    n_ok, n_failed = run_batch(args.input, args.output, n_jobs=args.n_jobs,
+                               chunk_size=args.chunk_size, cache=args.cache)
+    print(f'{n_ok} conformers written to {args.output}, {n_failed} failures')
+    sys.exit()
 
-params_to_change = {'add_hs' : True}
-config = gm.MoleculeGraphConfig(**params_to_change) # Initializ MoleculeGraphConfig object to control configuration of graph
-# print(config.dict())
-# sys.exit()
-graph = gm.construct_graph(smiles=args.smile, config=config)
-nodes = graph.nodes
-new_nodes = [node.split(':')[0] for node in nodes]
-colors = [atom_color[atom] for atom in new_nodes]
-new_nodes = [new_nodes[i] + f'{i+1}' for i in range(len(nodes))]
-mapping = dict(zip(nodes,new_nodes))
-graph = nx.relabel_nodes(graph, mapping)
-
-conf = mol.GetConformer()
-positions = {new_nodes[i] : [conf.GetAtomPosition(i).x, conf.GetAtomPosition(i).y]
-             for i in range(len(new_nodes))}
-print(positions)
-positions['H22'][0] += 0.25
-positions['H22'][1] += 0.7
+# Plotting libraries are only needed for the single-molecule drawing
+import networkx as nx
+import matplotlib.pyplot as plt
 
-positions['H15'][0] -= 0.45
-positions['H15'][1] -= 0.4
+mol = smi2xyz(args.smile, args.name, cache=args.cache)
 
-positions['H19'][0] += 0.7
-positions['H19'][1] -= 0.35
+# Graph straight from the embedded molecule (hydrogens included), with
+# nodes named <symbol><index+1>
+mol_graph = mol_to_graph(mol)
+colors = [atom_color[atom] for atom in mol_graph['symbols']]
+new_nodes = [atom + f'{i+1}' for i, atom in enumerate(mol_graph['symbols'])]
+graph = to_networkx(mol_graph, labels=new_nodes)
 
-positions['H21'][1] -= 0.4
+# Project the conformer on its principal plane and push overlapping
+# atoms apart so every label stays readable
+xy = layout_2d(mol.GetConformer().GetPositions(), min_dist=args.min_dist)
+positions = dict(zip(new_nodes, xy))
 
 nx.draw(graph, pos = positions, with_labels = True, node_size = 600, width = 2,
         node_color = colors, font_color = 'white', edgecolors = 'black')
@@ -91,5 +93,6 @@ plt.savefig(f'graph_{args.name}.png', dpi = 300, transparent = True)
 # print(graph.nodes)
 sys.exit()
 # graph.graph["rdmol"]
+from rdkit.Chem import Draw
 Draw.MolToFile(Chem.MolFromSmiles(args.smile), f'{args.name}.png', size = (600,600))
 
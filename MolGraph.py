@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:20:12 2026
+
+@author: alfonsocabezonvizoso
+"""
+
+import numpy as np
+
+
+def mol_to_graph(mol):
+    '''
+    Molecular graph of an RDKit Mol as NumPy arrays.
+
+    The atoms and bonds are read straight from ``mol``, so no second SMILES
+    parse or graph library is needed. Node i is atom i of ``mol``.
+
+    Parameters
+    ----------
+    mol : rdkit.Chem.Mol
+        Molecule, with explicit hydrogens if they should be nodes.
+
+    Returns
+    -------
+    dict
+        ``symbols`` (list of str), ``atomic_numbers`` (n_atoms,) uint8,
+        ``aromatic`` (n_atoms,) bool, ``formal_charge`` (n_atoms,) int8,
+        ``edge_index`` (2, n_bonds) int32 with one column per bond, and
+        ``bond_order`` (n_bonds,) float32 (1.5 for aromatic bonds).
+
+    '''
+    atoms = mol.GetAtoms()
+    bonds = mol.GetBonds()
+    n_bonds = mol.GetNumBonds()
+    edge_index = np.empty((2, n_bonds), dtype=np.int32)
+    bond_order = np.empty(n_bonds, dtype=np.float32)
+    for k, bond in enumerate(bonds):
+        edge_index[0, k] = bond.GetBeginAtomIdx()
+        edge_index[1, k] = bond.GetEndAtomIdx()
+        bond_order[k] = bond.GetBondTypeAsDouble()
+    return {'symbols': [atom.GetSymbol() for atom in atoms],
+            'atomic_numbers': np.array([atom.GetAtomicNum() for atom in atoms], dtype=np.uint8),
+            'aromatic': np.array([atom.GetIsAromatic() for atom in atoms], dtype=bool),
+            'formal_charge': np.array([atom.GetFormalCharge() for atom in atoms], dtype=np.int8),
+            'edge_index': edge_index,
+            'bond_order': bond_order}
+
+
+def to_networkx(graph : dict, labels=None):
+    '''
+    networkx view of a graph from ``mol_to_graph``. networkx is imported
+    only when this function is called.
+
+    Parameters
+    ----------
+    graph : dict
+        Output of ``mol_to_graph``.
+    labels : sequence of str, optional
+        Node names. The default is '<symbol>:<index>' as used by graphein.
+
+    Returns
+    -------
+    networkx.Graph
+        Graph with ``element`` and ``atomic_number`` node attributes and a
+        ``bond_order`` edge attribute.
+
+    '''
+    import networkx as nx
+
+    symbols = graph['symbols']
+    if labels is None:
+        labels = [f'{s}:{i}' for i, s in enumerate(symbols)]
+    G = nx.Graph()
+    G.add_nodes_from((label, {'element': s, 'atomic_number': int(z)})
+                     for label, s, z in zip(labels, symbols, graph['atomic_numbers']))
+    G.add_edges_from((labels[i], labels[j], {'bond_order': float(order)})
+                     for i, j, order in zip(*graph['edge_index'].tolist(),
+                                            graph['bond_order'].tolist()))
+    return G
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 13:05:22 2026
+
+@author: alfonsocabezonvizoso
+"""
+
+import itertools
+import numpy as np
+from PBC import cell_matrix, minimum_image, pairs_within
+
+
+def cell_list_pairs(positions, box, r_list : float):
+    '''
+    All pairs i < j within ``r_list`` using a periodic cell-linked list.
+
+    Particles are binned in fractional coordinates into cells whose planes
+    are at least ``r_list`` apart, so every neighbour of a particle lies in
+    its own cell or in one of the adjacent 3**dim - 1 cells. Works for
+    orthorhombic and triclinic boxes; when the box holds fewer than three
+    cells along some direction the blocked all-pairs scan of PBC.py is used
+    instead.
+
+    Parameters
+    ----------
+    positions : np.ndarray
+        Positions, shape (N, dim).
+    box : array_like
+        Cell lengths or cell matrix, see ``PBC.cell_matrix``.
+    r_list : float
+        Pair search radius.
+
+    Returns
+    -------
+    i, j : np.ndarray
+        int32 pair indices with i < j.
+
+    '''
+    H = cell_matrix(box)
+    positions = np.asarray(positions, dtype=float)
+    n = len(positions)
+    H_inv = np.linalg.inv(H)
+    heights = 1 / np.linalg.norm(H_inv, axis=0)
+    n_cells = np.floor(heights / r_list).astype(int)
+    if np.any(n_cells < 3):
+        i, j, _ = pairs_within(positions, H, r_list)
+        return i.astype(np.int32), j.astype(np.int32)
+
+    s = positions @ H_inv
+    s -= np.floor(s)
+    cell = np.minimum((s * n_cells).astype(int), n_cells - 1)
+    flat = np.ravel_multi_index(cell.T, n_cells)
+    order = np.argsort(flat, kind='stable')
+    counts = np.bincount(flat, minlength=int(np.prod(n_cells)))
+    starts = np.cumsum(counts) - counts
+
+    found_i, found_j = [], []
+    particles = np.arange(n)
+    for offset in itertools.product((-1, 0, 1), repeat=len(H)):
+        neighbour = np.ravel_multi_index(((cell + offset) % n_cells).T, n_cells)
+        cnt = counts[neighbour]
+        ii = np.repeat(particles, cnt)
+        rank = np.arange(len(ii)) - np.repeat(np.cumsum(cnt) - cnt, cnt)
+        jj = order[np.repeat(starts[neighbour], cnt) + rank]
+        keep = ii < jj
+        ii, jj = ii[keep], jj[keep]
+        d = minimum_image(positions[jj] - positions[ii], H)
+        keep = np.einsum('ij,ij->i', d, d) < r_list ** 2
+        found_i.append(ii[keep])
+        found_j.append(jj[keep])
+    return (np.concatenate(found_i).astype(np.int32),
+            np.concatenate(found_j).astype(np.int32))
+
+
+class VerletList:
+    '''
+    Verlet neighbour list with a skin, stored in CSR form.
+
+    The list holds every pair i < j within ``cutoff + skin`` and is only
+    rebuilt by ``update`` once some particle has moved more than half the
+    skin since the last build, which guarantees that no pair within
+    ``cutoff`` is missed in between.
+
+    Parameters
+    ----------
+    box : array_like
+        Cell lengths or cell matrix, see ``PBC.cell_matrix``.
+    cutoff : float
+        Interaction cutoff.
+    skin : float, optional
+        Extra search radius. The default is 0.3.
+
+    Attributes
+    ----------
+    indptr : np.ndarray
+        int32 array of length N + 1; the neighbours j > i of particle i are
+        ``indices[indptr[i]:indptr[i + 1]]``.
+    indices : np.ndarray
+        int32 neighbour indices.
+    n_builds : int
+        Number of times the list has been built.
+
+    '''
+
+    def __init__(self, box, cutoff : float, skin : float = 0.3):
+        self.box = cell_matrix(box)
+        self.cutoff = float(cutoff)
+        self.skin = float(skin)
+        self.indptr = None
+        self.indices = None
+        self.n_builds = 0
+        self._reference = None
+
+    def build(self, positions):
+        '''
+        Build the list from scratch for ``positions``.
+        '''
+        positions = np.asarray(positions, dtype=float)
+        i, j = cell_list_pairs(positions, self.box, self.cutoff + self.skin)
+        order = np.lexsort((j, i))
+        self.indices = j[order]
+        self.indptr = np.zeros(len(positions) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(i, minlength=len(positions)), out=self.indptr[1:])
+        self._reference = positions.copy()
+        self.n_builds += 1
+
+    def update(self, positions):
+        '''
+        Rebuild the list if any particle has moved more than half the skin.
+
+        Returns
+        -------
+        bool
+            True if the list was rebuilt.
+
+        '''
+        if self._reference is None or len(positions) != len(self._reference):
+            self.build(positions)
+            return True
+        d = minimum_image(np.asarray(positions, dtype=float) - self._reference, self.box)
+        if np.max(np.einsum('ij,ij->i', d, d)) > (0.5 * self.skin) ** 2:
+            self.build(positions)
+            return True
+        return False
+
+    def pairs(self):
+        '''
+        Pair indices (i, j) of the list as int32 arrays.
+        '''
+        i = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int32),
+                      np.diff(self.indptr))
+        return i, self.indices
+
+    def neighbors(self, i : int):
+        '''
+        Neighbours j > i of particle ``i``.
+        '''
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def within_cutoff(self, positions):
+        '''
+        Pairs of the list that are currently closer than ``cutoff``.
+
+        Returns
+        -------
+        i, j : np.ndarray
+            int32 pair indices.
+        d : np.ndarray
+            Minimum-image displacements positions[j] - positions[i].
+
+        '''
+        positions = np.asarray(positions, dtype=float)
+        i, j = self.pairs()
+        d = minimum_image(positions[j] - positions[i], self.box)
+        keep = np.einsum('ij,ij->i', d, d) < self.cutoff ** 2
+        return i[keep], j[keep], d[keep]
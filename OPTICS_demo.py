@@ -9,9 +9,11 @@ Created on Tue Jul 22 18:20:55 2025
 import numpy as np
 import matplotlib.pyplot as plt
 plt.rcParams['font.family'] = 'Times New Roman'
-from sklearn.cluster import OPTICS
 from sklearn.datasets import make_blobs
 from matplotlib import gridspec
+from matplotlib.collections import LineCollection
+from OpticsClustering import ScalableOPTICS, decimate_reachability, spanning_tree_segments
+from DensityPlot import DENSITY_THRESHOLD, cluster_density, density_scatter
 
 # Generate sample data
 n_samples = 500
@@ -23,8 +25,10 @@ X, _ = make_blobs(
     random_state=random_state
 )
 
-# Run OPTICS
-optics_model = OPTICS(min_samples=10, xi=0.05, min_cluster_size=0.05)
+# Run OPTICS on a k-nearest neighbor graph. For MD frames, set cache_dir
+# to reuse the neighbor index and n_jobs to parallelize the queries; other
+# xi / min_cluster_size values only need optics_model.extract_xi()
+optics_model = ScalableOPTICS(min_samples=10, xi=0.05, min_cluster_size=0.05)
 optics_model.fit(X)
 
 # Extract reachability and ordering
@@ -39,6 +43,8 @@ predecessors = optics_model.predecessor_
 labels = optics_model.labels_
 labels_ordered = labels[ordering]
 cluster_colors = {0: 'indianred', 1: 'royalblue', 2: 'black'}
+# Large inputs are drawn as raster densities instead of one marker per point
+dense = len(X) > DENSITY_THRESHOLD
 
 # Create figure with GridSpec
 fig = plt.figure(figsize=(14, 12))
@@ -47,7 +53,10 @@ gs = gridspec.GridSpec(2, 2, height_ratios=[1, 1.2])
 
 # Top-left: scatter plot
 ax0 = fig.add_subplot(gs[0, 0])
-ax0.scatter(X[:, 0], X[:, 1], s=15, c = 'gray')
+if dense:
+    density_scatter(ax0, X[:, 0], X[:, 1], color='gray')
+else:
+    ax0.scatter(X[:, 0], X[:, 1], s=15, c = 'gray')
 # ax0.set_xlabel('Feature 0')
 # ax0.set_ylabel('Feature 1')
 ax0.set_title('Input data for OPTICS', fontsize = 20)
@@ -55,17 +64,17 @@ ax0.set_title('Input data for OPTICS', fontsize = 20)
 
 # Top-right: spanning tree
 ax1 = fig.add_subplot(gs[0, 1])
-for idx, pred in enumerate(predecessors):
-    if pred != -1:
-        ax1.plot(
-            [X[idx, 0], X[pred, 0]],
-            [X[idx, 1], X[pred, 1]],
-            linewidth=2.5, c = 'green', alpha = 0.2
-        )
+# All predecessor edges in a single collection
+ax1.add_collection(LineCollection(spanning_tree_segments(X, predecessors),
+                                  linewidths=2.5, colors='green', alpha=0.2,
+                                  rasterized=dense))
 # Scatter points colored by cluster
-for lbl, color in cluster_colors.items():
-    mask = labels == lbl
-    ax1.scatter(X[mask, 0], X[mask, 1], s=30, color=color, label=f'Cluster {lbl}')
+if dense:
+    cluster_density(ax1, X[:, 0], X[:, 1], labels, cluster_colors, zorder=2)
+else:
+    for lbl, color in cluster_colors.items():
+        mask = labels == lbl
+        ax1.scatter(X[mask, 0], X[mask, 1], s=30, color=color, label=f'Cluster {lbl}')
 # ax1.scatter(X[:, 0], X[:, 1], s=15)
 # ax1.set_xlabel('Feature 0')
 # ax1.set_ylabel('Feature 1', fontsize = 18)
@@ -74,11 +83,14 @@ ax1.set_title('OPTICS Spanning Tree', fontsize = 20)
 ax1.legend(fontsize = 16)
 
 # Bottom (spanning both cols): reachability plot colored by cluster
+# Large inputs are reduced to the minima and maxima of short stretches,
+# which look the same at this resolution
 ax2 = fig.add_subplot(gs[1, :])
-ax2.plot(space, reachability, color = 'green', alpha = 0.3)
+keep = decimate_reachability(reachability)
+ax2.plot(space[keep], reachability[keep], color = 'green', alpha = 0.3)
 for lbl, color in cluster_colors.items():
-    mask = labels_ordered == lbl
-    ax2.scatter(space[mask], reachability[mask], s=30, color=color, label=f'Cluster {lbl}')
+    mask = labels_ordered[keep] == lbl
+    ax2.scatter(space[keep][mask], reachability[keep][mask], s=30, color=color, label=f'Cluster {lbl}')
 ax2.set_xlabel('OPTICS indexing', fontsize = 18)
 ax2.set_ylabel('Reachability distance', fontsize = 18)
 ax2.set_title('OPTICS Reachability Plot', fontsize = 20)
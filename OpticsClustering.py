@@ -0,0 +1,575 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:02:47 2026
+
+@author: alfonsocabezonvizoso
+"""
+
+import argparse
+import collections
+import hashlib
+import heapq
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from sklearn.cluster import cluster_optics_dbscan, cluster_optics_xi
+from sklearn.neighbors import BallTree, KDTree
+
+_TREES = {'kd_tree': KDTree, 'ball_tree': BallTree}
+
+# Tree of the worker process, set once by the pool initializer
+_worker_tree = None
+
+
+def _init_worker(tree):
+    global _worker_tree
+    _worker_tree = tree
+
+
+def _query_chunk(start : int, stop : int, k : int, tree=None):
+    '''
+    k nearest neighbors of points start..stop-1 of the tree's own data.
+    '''
+    tree = tree if tree is not None else _worker_tree
+    data = np.asarray(tree.get_arrays()[0])
+    dist, ind = tree.query(data[start:stop], k=k)
+    return start, dist.astype(np.float32), ind.astype(np.int32)
+
+
+class NeighborIndex:
+    '''
+    KD-tree or ball tree over a data set, built once and cached on disk.
+
+    The cache files are named after the SHA-256 of the data and the tree
+    parameters, so the same frames always reuse the same tree and k-nearest
+    neighbor tables, whatever clustering parameters are asked for later.
+
+    Parameters
+    ----------
+    X : np.ndarray
+        Points, shape (n_samples, n_features).
+    algorithm : str, optional
+        'kd_tree' or 'ball_tree'. The default is 'kd_tree'.
+    leaf_size : int, optional
+        Leaf size of the tree. The default is 40.
+    metric : str, optional
+        Distance metric supported by the tree. The default is 'euclidean'.
+    cache_dir : str, optional
+        Directory of the cache. Without it nothing is written to disk.
+
+    '''
+
+    def __init__(self, X, algorithm : str = 'kd_tree', leaf_size : int = 40,
+                 metric : str = 'euclidean', cache_dir : str = None):
+        if algorithm not in _TREES:
+            raise ValueError(f'Unknown algorithm {algorithm!r}, use one of {sorted(_TREES)}')
+        X = np.ascontiguousarray(X, dtype=float)
+        self.n_samples = len(X)
+        self.algorithm = algorithm
+        self.leaf_size = leaf_size
+        self.metric = metric
+        self.cache_dir = cache_dir
+        digest = hashlib.sha256(X.view(np.uint8).ravel())
+        digest.update(f'{X.shape}|{algorithm}|{leaf_size}|{metric}'.encode())
+        self.key = digest.hexdigest()
+
+        path = self._path('tree.pkl')
+        if path is not None and os.path.exists(path):
+            with open(path, 'rb') as handle:
+                self.tree = pickle.load(handle)
+        else:
+            self.tree = _TREES[algorithm](X, leaf_size=leaf_size, metric=metric)
+            if path is not None:
+                os.makedirs(cache_dir, exist_ok=True)
+                with open(f'{path}.tmp', 'wb') as handle:
+                    pickle.dump(self.tree, handle, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(f'{path}.tmp', path)
+
+    def _path(self, suffix : str):
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir, f'{self.key[:16]}_{suffix}')
+
+    def kneighbors(self, k : int, chunk_size : int = 65536, n_jobs : int = 1):
+        '''
+        k nearest neighbors of every point, the point itself included.
+
+        Queries run in chunks of ``chunk_size`` points, over ``n_jobs`` worker
+        processes if n_jobs > 1 (None means os.cpu_count()). Every worker
+        receives the tree once and at most a few chunks per worker are in
+        flight. The result is cached next to the tree.
+
+        Returns
+        -------
+        distances : np.ndarray
+            Sorted neighbor distances, float32 (n_samples, k).
+        indices : np.ndarray
+            Neighbor indices, int32 (n_samples, k).
+
+        '''
+        k = min(int(k), self.n_samples)
+        path = self._path(f'knn{k}.npz')
+        if path is not None and os.path.exists(path):
+            with np.load(path) as data:
+                return data['distances'], data['indices']
+
+        distances = np.empty((self.n_samples, k), dtype=np.float32)
+        indices = np.empty((self.n_samples, k), dtype=np.int32)
+        starts = range(0, self.n_samples, chunk_size)
+
+        def store(result):
+            start, dist, ind = result
+            distances[start:start + len(dist)] = dist
+            indices[start:start + len(ind)] = ind
+
+        n_jobs = n_jobs or os.cpu_count()
+        if n_jobs == 1:
+            for start in starts:
+                store(_query_chunk(start, start + chunk_size, k, self.tree))
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                     initargs=(self.tree,)) as pool:
+                pending = collections.deque()
+                for start in starts:
+                    pending.append(pool.submit(_query_chunk, start, start + chunk_size, k))
+                    if len(pending) >= 4 * n_jobs:
+                        store(pending.popleft().result())
+                while pending:
+                    store(pending.popleft().result())
+
+        if path is not None:
+            tmp = f'{path}.tmp.npz'
+            np.savez(tmp, distances=distances, indices=indices)
+            os.replace(tmp, path)
+        return distances, indices
+
+
+def neighbor_graph(distances, indices):
+    '''
+    Symmetric CSR graph of a k-nearest neighbor table: every edge i -> j is
+    also stored as j -> i, so points that are near someone but have that
+    someone outside their own k neighbors stay connected. Rows are sorted by
+    distance.
+
+    Returns
+    -------
+    indptr : np.ndarray
+        Row offsets, int64 (n_samples + 1,).
+    indices : np.ndarray
+        Column indices, int32.
+    distances : np.ndarray
+        Edge lengths, float32.
+
+    '''
+    n, k = indices.shape
+    rows = np.repeat(np.arange(n, dtype=np.int32), k)
+    src = np.concatenate([rows, indices.ravel()])
+    dst = np.concatenate([indices.ravel(), rows])
+    dist = np.concatenate([distances.ravel(), distances.ravel()])
+    del rows
+    return _csr(src, dst, dist, n)
+
+
+def _csr(src, dst, dist, n : int):
+    # Sort by distance, then stably by row
+    order = np.argsort(dist, kind='stable')
+    order = order[np.argsort(src[order], kind='stable')]
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr, dst[order], dist[order]
+
+
+def connect_components(index, X, graph, small : int = 256):
+    '''
+    Join the connected components of a neighbor graph.
+
+    A k-nearest neighbor graph has no edges between well separated groups of
+    points, which would leave infinite reachabilities at every jump between
+    them. In Boruvka rounds, every component but the largest gets the
+    shortest edge to a point outside it, until the graph is connected; the
+    ordering then sees the same jumps as OPTICS on the complete graph.
+    Components of up to ``small`` points query the tree of ``index`` for
+    size + 1 neighbors, which always reach outside; larger ones query a tree
+    built over the remaining points.
+
+    Parameters
+    ----------
+    index : NeighborIndex
+        Tree over ``X``.
+    X : np.ndarray
+        Points, shape (n_samples, n_features).
+    graph : tuple
+        (indptr, indices, distances) from ``neighbor_graph``.
+
+    Returns
+    -------
+    tuple
+        Connected graph in the same format.
+
+    '''
+    indptr, indices, distances = graph
+    n = len(indptr) - 1
+    while True:
+        adjacency = csr_matrix((np.ones(len(indices), dtype=np.int8), indices, indptr), shape=(n, n))
+        n_components, labels = connected_components(adjacency, directed=False)
+        if n_components == 1:
+            return indptr, indices, distances
+        sizes = np.bincount(labels)
+        members = np.argsort(labels, kind='stable')
+        bounds = np.cumsum(sizes) - sizes
+        src, dst, dist = [], [], []
+        for c in np.flatnonzero(np.arange(n_components) != sizes.argmax()):
+            points = members[bounds[c]:bounds[c] + sizes[c]]
+            if sizes[c] <= small:
+                d, j = index.tree.query(X[points], k=sizes[c] + 1)
+                d[labels[j] == c] = np.inf
+            else:
+                rest = np.flatnonzero(labels != c)
+                tree = _TREES[index.algorithm](X[rest], leaf_size=index.leaf_size, metric=index.metric)
+                d, j = tree.query(X[points], k=1)
+                j = rest[j]
+            row, col = np.unravel_index(np.argmin(d), d.shape)
+            src.append(points[row])
+            dst.append(j[row, col])
+            dist.append(d[row, col])
+        rows = np.repeat(np.arange(n, dtype=np.int32), np.diff(indptr))
+        indptr, indices, distances = _csr(
+            np.concatenate([rows, src, dst]).astype(np.int32),
+            np.concatenate([indices, dst, src]).astype(np.int32),
+            np.concatenate([distances, dist, dist]).astype(np.float32), n)
+
+
+def optics_ordering(indptr, indices, distances, core_distances, max_eps : float = np.inf):
+    '''
+    OPTICS ordering over a sparse neighbor graph.
+
+    The seed list is a binary heap with lazy deletion, so every point costs
+    O(k log n) instead of the O(n) scan over all unprocessed points of the
+    dense algorithm. Reachability is only propagated along graph edges; with
+    a complete graph the result is exact OPTICS.
+
+    Parameters
+    ----------
+    indptr, indices, distances : np.ndarray
+        CSR graph from ``neighbor_graph``, rows sorted by distance.
+    core_distances : np.ndarray
+        Core distance of every point, np.inf for points that are not core.
+    max_eps : float, optional
+        Largest neighborhood radius. The default is np.inf.
+
+    Returns
+    -------
+    ordering : np.ndarray
+        Cluster-ordered indices of the points.
+    reachability : np.ndarray
+        Reachability distance of every point (in input order).
+    predecessor : np.ndarray
+        Point each one was reached from, -1 for seeds.
+
+    '''
+    n = len(core_distances)
+    # The loop works on Python lists, which index much faster than NumPy
+    # arrays element by element. ``best`` is the current reachability of
+    # unprocessed points and -inf once a point is processed.
+    best = [np.inf] * n
+    reachability = [np.inf] * n
+    predecessor = [-1] * n
+    core_list = np.asarray(core_distances, dtype=float).tolist()
+    ordering = np.empty(n, dtype=np.intp)
+    heap = []
+    next_seed = 0
+    for position in range(n):
+        point = -1
+        while heap:
+            reach, candidate = heapq.heappop(heap)
+            # Entries of processed points or superseded by a smaller
+            # reachability are skipped
+            if reach == best[candidate]:
+                point = candidate
+                break
+        if point < 0:
+            # No reachable point left: start from the next unprocessed one
+            while best[next_seed] == -np.inf:
+                next_seed += 1
+            point = next_seed
+        reachability[point] = best[point]
+        best[point] = -np.inf
+        ordering[position] = point
+
+        core = core_list[point]
+        if core == np.inf:
+            continue
+        # Neighbors are sorted by distance, so the scan stops at max_eps
+        start, stop = indptr[point], indptr[point + 1]
+        for d, p in zip(distances[start:stop].tolist(), indices[start:stop].tolist()):
+            if d > max_eps:
+                break
+            reach = d if d > core else core
+            if reach < best[p]:
+                best[p] = reach
+                predecessor[p] = point
+                heapq.heappush(heap, (reach, p))
+    reachability = np.array(reachability)
+    predecessor = np.array(predecessor, dtype=np.intp)
+    return ordering, reachability, predecessor
+
+
+def spanning_tree_segments(X, predecessor):
+    '''
+    Edges of the OPTICS spanning tree as one segment array, ready for a
+    matplotlib LineCollection.
+
+    Parameters
+    ----------
+    X : np.ndarray
+        Points, shape (n_samples, n_features). Only the first two features
+        are used.
+    predecessor : np.ndarray
+        Predecessor of every point, -1 for seeds.
+
+    Returns
+    -------
+    np.ndarray
+        Segments from every reached point to its predecessor, shape
+        (n_edges, 2, 2).
+
+    '''
+    X = np.asarray(X)
+    child = np.flatnonzero(np.asarray(predecessor) >= 0)
+    return np.stack([X[child, :2], X[predecessor[child], :2]], axis=1)
+
+
+def decimate_reachability(reachability, max_points : int = 20000):
+    '''
+    Positions of the reachability plot worth drawing.
+
+    The plot is cut into ``max_points // 2`` bins of consecutive positions
+    and the lowest and highest point of every bin is kept, so the valleys
+    (clusters) and peaks (boundaries) look the same as in the full plot,
+    which has far more points than pixels. Below ``max_points`` nothing is
+    dropped.
+
+    Parameters
+    ----------
+    reachability : np.ndarray
+        Reachability distances in OPTICS order.
+    max_points : int, optional
+        Largest number of kept positions. The default is 20000.
+
+    Returns
+    -------
+    np.ndarray
+        Sorted positions to keep.
+
+    '''
+    r = np.asarray(reachability, dtype=float)
+    n = len(r)
+    if n <= max_points:
+        return np.arange(n)
+    width = -(-2 * n // max_points)
+    n_bins = -(-n // width)
+    pad = n_bins * width - n
+    low = np.concatenate([r, np.full(pad, np.inf)]).reshape(n_bins, width)
+    high = np.concatenate([r, np.full(pad, -np.inf)]).reshape(n_bins, width)
+    offsets = np.arange(n_bins) * width
+    keep = np.concatenate([offsets + low.argmin(axis=1), offsets + high.argmax(axis=1),
+                           [0, n - 1]])
+    return np.unique(keep)
+
+
+class ScalableOPTICS:
+    '''
+    OPTICS for large data sets (e.g. 10^5-10^6 MD frames) built on a cached
+    neighbor index.
+
+    ``fit`` builds (or loads) the tree and a k-nearest neighbor table with
+    ``n_neighbors`` columns, computes the ordering on the symmetrized graph
+    and extracts clusters with the xi method. The ordering, reachability,
+    core distances and predecessors do not depend on ``xi`` or
+    ``min_cluster_size``, so ``extract_xi`` and ``extract_dbscan`` re-extract
+    clusters from them without refitting, and ``save`` / ``load`` keep them
+    between sessions. Attribute names follow sklearn.cluster.OPTICS.
+
+    Parameters
+    ----------
+    min_samples : int or float, optional
+        Neighborhood size of a core point, the point included. Values below 1
+        are a fraction of the number of samples. The default is 10.
+    n_neighbors : int, optional
+        Columns of the neighbor graph. Larger values bring the result closer
+        to exact OPTICS at the cost of memory. The default is
+        2 * min_samples.
+    max_eps : float, optional
+        Largest neighborhood radius. The default is np.inf.
+    xi : float, optional
+        Minimum steepness of a cluster boundary. The default is 0.05.
+    min_cluster_size : int or float, optional
+        Minimum cluster size, as count or fraction. The default is
+        min_samples.
+    predecessor_correction : bool, optional
+        Correct clusters with the predecessors. The default is True.
+    algorithm, leaf_size, metric, cache_dir :
+        Passed to ``NeighborIndex``.
+    chunk_size : int, optional
+        Points per neighbor query. The default is 65536.
+    n_jobs : int, optional
+        Worker processes for the neighbor queries. The default is 1.
+
+    '''
+
+    def __init__(self, min_samples=10, n_neighbors : int = None, max_eps : float = np.inf,
+                 xi : float = 0.05, min_cluster_size=None, predecessor_correction : bool = True,
+                 algorithm : str = 'kd_tree', leaf_size : int = 40, metric : str = 'euclidean',
+                 cache_dir : str = None, chunk_size : int = 65536, n_jobs : int = 1):
+        self.min_samples = min_samples
+        self.n_neighbors = n_neighbors
+        self.max_eps = max_eps
+        self.xi = xi
+        self.min_cluster_size = min_cluster_size
+        self.predecessor_correction = predecessor_correction
+        self.algorithm = algorithm
+        self.leaf_size = leaf_size
+        self.metric = metric
+        self.cache_dir = cache_dir
+        self.chunk_size = chunk_size
+        self.n_jobs = n_jobs
+
+    def _min_samples(self, n : int):
+        if self.min_samples <= 1:
+            return max(2, int(round(self.min_samples * n)))
+        return int(self.min_samples)
+
+    def fit(self, X):
+        '''
+        Compute the OPTICS ordering of ``X`` and extract clusters.
+        '''
+        X = np.asarray(X, dtype=float)
+        min_samples = self._min_samples(len(X))
+        if min_samples > len(X):
+            raise ValueError(f'min_samples={min_samples} is larger than the {len(X)} samples')
+        k = max(min_samples, self.n_neighbors or 2 * min_samples)
+
+        index = NeighborIndex(X, algorithm=self.algorithm, leaf_size=self.leaf_size,
+                              metric=self.metric, cache_dir=self.cache_dir)
+        distances, indices = index.kneighbors(k, chunk_size=self.chunk_size, n_jobs=self.n_jobs)
+
+        self.core_distances_ = distances[:, min_samples - 1].astype(float)
+        self.core_distances_[self.core_distances_ > self.max_eps] = np.inf
+        graph = connect_components(index, X, neighbor_graph(distances, indices))
+        del distances, indices
+        self.ordering_, self.reachability_, self.predecessor_ = optics_ordering(
+            *graph, self.core_distances_, self.max_eps)
+        self.extract_xi()
+        return self
+
+    def extract_xi(self, xi : float = None, min_cluster_size=None,
+                   predecessor_correction : bool = None):
+        '''
+        Extract clusters with the xi method from the stored ordering. Unset
+        arguments keep their current value; new values are remembered.
+
+        Returns
+        -------
+        np.ndarray
+            Cluster label of every point, -1 for noise.
+
+        '''
+        if xi is not None:
+            self.xi = xi
+        if min_cluster_size is not None:
+            self.min_cluster_size = min_cluster_size
+        if predecessor_correction is not None:
+            self.predecessor_correction = predecessor_correction
+        min_samples = self._min_samples(len(self.ordering_))
+        self.labels_, self.cluster_hierarchy_ = cluster_optics_xi(
+            reachability=self.reachability_, predecessor=self.predecessor_,
+            ordering=self.ordering_, min_samples=min_samples,
+            min_cluster_size=self.min_cluster_size or min_samples, xi=self.xi,
+            predecessor_correction=self.predecessor_correction)
+        return self.labels_
+
+    def extract_dbscan(self, eps : float):
+        '''
+        DBSCAN labels at radius ``eps`` (not above ``max_eps``) from the
+        stored ordering. ``labels_`` is updated.
+        '''
+        self.labels_ = cluster_optics_dbscan(
+            reachability=self.reachability_, core_distances=self.core_distances_,
+            ordering=self.ordering_, eps=eps)
+        return self.labels_
+
+    def save(self, path : str):
+        '''
+        Write the ordering, distances, predecessors, labels and parameters to
+        an ``.npz`` file, replaced atomically.
+        '''
+        tmp = f'{path}.tmp.npz'
+        np.savez(tmp, ordering=self.ordering_, reachability=self.reachability_,
+                 core_distances=self.core_distances_, predecessor=self.predecessor_,
+                 labels=self.labels_, min_samples=self.min_samples,
+                 max_eps=self.max_eps, xi=self.xi,
+                 min_cluster_size=np.nan if self.min_cluster_size is None else self.min_cluster_size,
+                 predecessor_correction=self.predecessor_correction)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path : str):
+        '''
+        Restore a model written by ``save``; clusters can be re-extracted
+        right away.
+        '''
+        with np.load(path) as data:
+            min_cluster_size = data['min_cluster_size'].item()
+            model = cls(min_samples=data['min_samples'].item(), max_eps=float(data['max_eps']),
+                        xi=float(data['xi']),
+                        min_cluster_size=None if np.isnan(min_cluster_size) else min_cluster_size,
+                        predecessor_correction=bool(data['predecessor_correction']))
+            model.ordering_ = data['ordering']
+            model.reachability_ = data['reachability']
+            model.core_distances_ = data['core_distances']
+            model.predecessor_ = data['predecessor']
+            model.labels_ = data['labels']
+        return model
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='OPTICS clustering of large data sets')
+    parser.add_argument('-i', '--input', help='.npy file with one point (e.g. frame features) per row',
+                        action='store', type = str, default=None)
+    parser.add_argument('-r', '--result', help='OPTICS result file (.npz). Without --input, clusters are re-extracted from it',
+                        action='store', type = str, default='optics.npz')
+    parser.add_argument('-m', '--min_samples', help='Neighborhood size of a core point',
+                        action='store', type = float, default=10)
+    parser.add_argument('-k', '--n_neighbors', help='Columns of the neighbor graph',
+                        action='store', type = int, default=None)
+    parser.add_argument('--xi', help='Minimum steepness of a cluster boundary',
+                        action='store', type = float, default=0.05)
+    parser.add_argument('--min_cluster_size', help='Minimum cluster size (count or fraction)',
+                        action='store', type = float, default=None)
+    parser.add_argument('-j', '--n_jobs', help='Worker processes for the neighbor queries',
+                        action='store', type = int, default=1)
+    parser.add_argument('-c', '--cache_dir', help='Directory of the neighbor index cache',
+                        action='store', type = str, default=None)
+    args = parser.parse_args()
+
+    min_samples = int(args.min_samples) if args.min_samples >= 1 else args.min_samples
+    min_cluster_size = args.min_cluster_size
+    if min_cluster_size is not None and min_cluster_size >= 1:
+        min_cluster_size = int(min_cluster_size)
+
+    if args.input is not None:
+        X = np.load(args.input, mmap_mode='r')
+        model = ScalableOPTICS(min_samples=min_samples, n_neighbors=args.n_neighbors,
+                               xi=args.xi, min_cluster_size=min_cluster_size,
+                               cache_dir=args.cache_dir, n_jobs=args.n_jobs).fit(X)
+    else:
+        model = ScalableOPTICS.load(args.result)
+        model.extract_xi(xi=args.xi, min_cluster_size=min_cluster_size)
+    model.save(args.result)
+    labels, counts = np.unique(model.labels_, return_counts=True)
+    for label, count in zip(labels, counts):
+        print(f'{"noise" if label < 0 else f"cluster {label}"}: {count}')
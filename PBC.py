@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 12:15:07 2026
+
+@author: alfonsocabezonvizoso
+"""
+
+import itertools
+import numpy as np
+
+
+def cell_matrix(box):
+    '''
+    Cell matrix whose rows are the cell vectors.
+
+    Parameters
+    ----------
+    box : array_like
+        Either the edge lengths of an orthorhombic cell, shape (dim,), or a
+        full (dim, dim) matrix with one cell vector per row.
+
+    Returns
+    -------
+    np.ndarray
+        (dim, dim) cell matrix.
+
+    '''
+    box = np.asarray(box, dtype=float)
+    if box.ndim == 1:
+        return np.diag(box)
+    if box.ndim != 2 or box.shape[0] != box.shape[1]:
+        raise ValueError(f'Box must be (dim,) or (dim, dim), got {box.shape}')
+    return box
+
+
+def is_orthorhombic(box):
+    '''
+    True if all cell vectors are along the Cartesian axes.
+    '''
+    H = cell_matrix(box)
+    return np.allclose(H, np.diag(np.diag(H)))
+
+
+def image_shifts(box, n : int = 1):
+    '''
+    Lattice translations of all periodic images with integer indices in
+    [-n, n] along every cell vector, the first index varying slowest.
+
+    Returns
+    -------
+    np.ndarray
+        ((2n+1)**dim, dim) array of Cartesian shifts.
+
+    '''
+    H = cell_matrix(box)
+    idx = np.array(list(itertools.product(range(-n, n + 1), repeat=len(H))), dtype=float)
+    return idx @ H
+
+
+def wrap(positions, box, origin=None):
+    '''
+    Map positions into the periodic cell spanned from ``origin``.
+
+    Parameters
+    ----------
+    positions : np.ndarray
+        Positions, shape (..., dim).
+    box : array_like
+        Cell lengths or cell matrix, see ``cell_matrix``.
+    origin : array_like, optional
+        Lower corner of the cell. The default is the coordinate origin.
+
+    Returns
+    -------
+    np.ndarray
+        Wrapped positions with the same shape as ``positions``.
+
+    '''
+    H = cell_matrix(box)
+    positions = np.asarray(positions, dtype=float)
+    origin = np.zeros(len(H)) if origin is None else np.asarray(origin, dtype=float)
+    if is_orthorhombic(H):
+        L = np.diag(H)
+        return positions - L * np.floor((positions - origin) / L)
+    s = (positions - origin) @ np.linalg.inv(H)
+    return positions - np.floor(s) @ H
+
+
+def minimum_image(d, box):
+    '''
+    Minimum-image convention for displacement vectors.
+
+    For orthorhombic cells this is the usual rounding of each component.
+    For triclinic cells the rounding is done in fractional coordinates and
+    then refined over the neighbouring images, which is exact for any cell
+    whose shortest image is among the 3**dim nearest ones.
+
+    Parameters
+    ----------
+    d : np.ndarray
+        Displacements, shape (..., dim).
+    box : array_like
+        Cell lengths or cell matrix, see ``cell_matrix``.
+
+    Returns
+    -------
+    np.ndarray
+        Minimum-image displacements with the same shape as ``d``.
+
+    '''
+    H = cell_matrix(box)
+    d = np.asarray(d, dtype=float)
+    if is_orthorhombic(H):
+        L = np.diag(H)
+        return d - L * np.round(d / L)
+    d = d - np.round(d @ np.linalg.inv(H)) @ H
+    candidates = d[..., None, :] + image_shifts(H, 1)
+    best = np.argmin(np.einsum('...ij,...ij->...i', candidates, candidates), axis=-1)
+    index = np.broadcast_to(best[..., None, None], best.shape + (1, len(H)))
+    return np.take_along_axis(candidates, index, axis=-2)[..., 0, :]
+
+
+def distance(a, b, box):
+    '''
+    Minimum-image distance between positions ``a`` and ``b`` (broadcast).
+    '''
+    d = minimum_image(np.asarray(b, dtype=float) - np.asarray(a, dtype=float), box)
+    return np.sqrt(np.einsum('...i,...i->...', d, d))
+
+
+def iter_distance_blocks(positions, box, max_bytes : int = 2**26):
+    '''
+    Minimum-image distance matrix in row blocks.
+
+    The number of rows per block is chosen so that the temporaries of one
+    block, (rows, N, dim) displacements times 3**dim image candidates for
+    triclinic cells, stay below ``max_bytes``. All pairs of 10^5 atoms can
+    therefore be visited in bounded memory.
+
+    Parameters
+    ----------
+    positions : np.ndarray
+        Positions, shape (N, dim).
+    box : array_like
+        Cell lengths or cell matrix, see ``cell_matrix``.
+    max_bytes : int, optional
+        Memory budget for the temporaries of one block. The default is 64 MB.
+
+    Yields
+    ------
+    start : int
+        Index of the first row of the block.
+    block : np.ndarray
+        Distances from positions[start:start + len(block)] to all positions.
+
+    '''
+    positions = np.asarray(positions, dtype=float)
+    n, dim = positions.shape
+    # minimum_image keeps about four displacement-sized temporaries alive
+    n_candidates = 1 if is_orthorhombic(box) else 3 ** dim
+    n_temporaries = 4
+    rows = max(1, max_bytes // (n * dim * positions.itemsize * n_candidates * n_temporaries))
+    for start in range(0, n, rows):
+        block = positions[start:start + rows]
+        yield start, distance(block[:, None, :], positions[None, :, :], box)
+
+
+def pairs_within(positions, box, cutoff : float, max_bytes : int = 2**26):
+    '''
+    All pairs i < j closer than ``cutoff`` under the minimum-image convention,
+    found by a blocked all-pairs scan whose blocks stay below ``max_bytes``
+    (see ``iter_distance_blocks``).
+
+    Returns
+    -------
+    i, j : np.ndarray
+        Pair indices.
+    r : np.ndarray
+        Pair distances.
+
+    '''
+    found_i, found_j, found_r = [], [], []
+    n = len(positions)
+    for start, block in iter_distance_blocks(positions, box, max_bytes):
+        rows = np.arange(start, start + len(block))
+        mask = (block < cutoff) & (rows[:, None] < np.arange(n)[None, :])
+        ii, jj = np.nonzero(mask)
+        found_i.append(ii + start)
+        found_j.append(jj)
+        found_r.append(block[ii, jj])
+    if not found_i:
+        empty = np.empty(0, dtype=np.intp)
+        return empty, empty, np.empty(0)
+    return np.concatenate(found_i), np.concatenate(found_j), np.concatenate(found_r)
+
+
+def split_at_boundary(start, displacement, box, origin=None):
+    '''
+    Split displacement vectors that leave the periodic cell.
+
+    Every vector is assumed to start inside the cell and to cross at most
+    one face. Crossing vectors are cut where they leave the cell and the
+    remainder is shifted back in through the opposite face.
+
+    Parameters
+    ----------
+    start : np.ndarray
+        Start points, shape (M, dim).
+    displacement : np.ndarray
+        Displacements, shape (M, dim).
+    box : array_like
+        Cell lengths or cell matrix, see ``cell_matrix``.
+    origin : array_like, optional
+        Lower corner of the cell. The default is the coordinate origin.
+
+    Returns
+    -------
+    crossed : np.ndarray
+        Boolean mask of vectors that leave the cell.
+    exit_point : np.ndarray
+        Point where each vector meets the cell boundary (equal to the end
+        point for vectors that stay inside).
+    entry_point : np.ndarray
+        ``exit_point`` shifted back into the cell.
+    end_point : np.ndarray
+        Wrapped end point of each vector.
+
+    '''
+    H = cell_matrix(box)
+    start = np.asarray(start, dtype=float)
+    displacement = np.asarray(displacement, dtype=float)
+    origin = np.zeros(len(H)) if origin is None else np.asarray(origin, dtype=float)
+    H_inv = np.linalg.inv(H)
+    s0 = (start - origin) @ H_inv
+    s1 = s0 + displacement @ H_inv
+    image = np.floor(s1)
+    crossed = np.any(image != 0, axis=1)
+
+    ds = s1 - s0
+    bound = np.where(s1 >= 1, 1.0, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t_face = np.where(image != 0, (bound - s0) / ds, np.inf)
+    t = np.where(crossed, np.min(t_face, axis=1), 1.0)
+
+    exit_point = start + t[:, None] * displacement
+    shift = image @ H
+    return crossed, exit_point, exit_point - shift, start + displacement - shift
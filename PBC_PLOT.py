@@ -8,7 +8,49 @@ Created on Sun Jan 18 12:18:39 2026
 
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
+from matplotlib.collections import EllipseCollection, LineCollection
+from matplotlib.colors import to_rgba_array
 import numpy as np
+from PBC import image_shifts, split_at_boundary
+
+def draw_replicas(ax, pos, vel, colors, shifts, box, origin, radius=0.06,
+                  alpha=1.0, zorder=5, head_width=0.03, head_length=0.04):
+    """
+    Draws every periodic image of the particles and their velocity vectors
+    with a constant number of artists, whatever the number of particles.
+    
+    Parameters:
+    - pos, vel: (N, 2) arrays of positions and velocities in the central box.
+    - colors: N particle colors.
+    - shifts: (M, 2) lattice shifts of the images to draw.
+    - box, origin: cell lengths and lower corner of the region in which
+      vectors are wrapped (the whole replica grid).
+    """
+    # All image positions with one broadcasted shift: (M*N, 2)
+    starts = (shifts[:, None, :] + pos[None, :, :]).reshape(-1, 2)
+    v = np.tile(vel, (len(shifts), 1))
+    rgba = np.tile(to_rgba_array(colors), (len(shifts), 1))
+    rgba[:, 3] = alpha
+
+    # Particles
+    circles = EllipseCollection(2*radius, 2*radius, 0, units='xy',
+                                offsets=starts, offset_transform=ax.transData,
+                                facecolors=rgba, edgecolors='none', zorder=zorder)
+    ax.add_collection(circles)
+
+    # Vectors crossing the edge are cut there and their tip re-enters
+    # through the opposite side
+    crossed, exit_p, entry_p, end_p = split_at_boundary(starts, v, box, origin)
+    cuts = np.stack([starts[crossed], exit_p[crossed]], axis=1)
+    ax.add_collection(LineCollection(cuts, colors='black', alpha=alpha,
+                                     linewidths=1, zorder=zorder))
+    tails = np.where(crossed[:, None], entry_p, starts)
+    shaft = 0.005
+    ax.quiver(tails[:, 0], tails[:, 1], end_p[:, 0] - tails[:, 0], end_p[:, 1] - tails[:, 1],
+              angles='xy', scale_units='xy', scale=1, units='xy', width=shaft,
+              headwidth=head_width/shaft, headlength=head_length/shaft,
+              headaxislength=head_length/shaft, color='black', alpha=alpha,
+              zorder=zorder)
 
 def draw_final_pbc_updates():
     plt.rcParams.update({
@@ -40,30 +82,29 @@ def draw_final_pbc_updates():
     # Colors
     colors = ['#084594', '#2171b5', '#9ecae1']
     
-    # Global Boundaries of the 3x3 visualization for wrapping logic
-    Y_MAX = 2.0  # Top of the j=1 row
-    Y_MIN = -1.0 # Bottom of the j=-1 row
+    # Lattice shifts of the 3x3 replica grid and the super-cell they span,
+    # used to wrap vectors leaving the visualization
+    shifts = image_shifts([L, L], 1)
+    super_box = [3*L, 3*L]
+    super_origin = shifts.min(axis=0)
     
     # --------------------------
     # 2. Draw Grid & Particles
     # --------------------------
-    grid_range = [-1, 0, 1]
     
     # Separate loop for boxes to handle z-order explicitly
     # Draw Replica Boxes FIRST (zorder=0)
-    for i in grid_range:
-        for j in grid_range:
-            shift = np.array([i*L, j*L])
-            is_center = (i == 0 and j == 0)
-            
-            if not is_center:
-                rect = patches.Rectangle((shift[0], shift[1]), L, L, 
-                                         linewidth=1.0,
-                                         edgecolor='#bdc3c7',
-                                         facecolor='none',
-                                         linestyle='--',
-                                         zorder=0) # Replicas at the bottom
-                ax.add_patch(rect)
+    for shift in shifts:
+        is_center = not shift.any()
+        
+        if not is_center:
+            rect = patches.Rectangle((shift[0], shift[1]), L, L, 
+                                     linewidth=1.0,
+                                     edgecolor='#bdc3c7',
+                                     facecolor='none',
+                                     linestyle='--',
+                                     zorder=0) # Replicas at the bottom
+            ax.add_patch(rect)
 
     # Draw Central Box LAST (zorder=1)
     # This ensures solid black lines overwrite the dashed grey lines of neighbors
@@ -75,70 +116,13 @@ def draw_final_pbc_updates():
                              zorder=1) # Center box on top of replicas
     ax.add_patch(rect_center)
 
-    # Draw Particles and Vectors
-    for i in grid_range:
-        for j in grid_range:
-            shift = np.array([i*L, j*L])
-            is_center = (i == 0 and j == 0)
-            
-            for k in range(len(pos)):
-                p = pos[k] + shift
-                v = vel[k]
-                
-                # Style
-                alpha = 1.0 if is_center else 0.4
-                zorder = 10 if is_center else 5
-                
-                # Draw Particle Circle
-                circle = patches.Circle(p, 0.06, 
-                                        facecolor=colors[k], 
-                                        edgecolor='none', 
-                                        alpha=alpha, 
-                                        zorder=zorder)
-                ax.add_patch(circle)
-                
-                # --- VECTOR HANDLING (Wrapped logic from previous turn) ---
-                start_p = p
-                end_p = p + v
-                draw_standard = True
-                
-                # Check for Global Boundary Crossing (Top Replicas j=1, Particle k=0)
-                if k == 0 and j == 1: 
-                    if end_p[1] > Y_MAX:
-                        draw_standard = False
-                        # 1. Draw cut vector (Start to Boundary)
-                        dy = v[1]
-                        dx = v[0]
-                        if dy != 0:
-                            t = (Y_MAX - start_p[1]) / dy
-                            intersect_x = start_p[0] + t * dx
-                            intersect_p = np.array([intersect_x, Y_MAX])
-                            
-                            ax.plot([start_p[0], intersect_x], [start_p[1], Y_MAX],
-                                    color='black', alpha=alpha, zorder=zorder, linewidth=1)
-                            
-                            # 2. Draw wrapped tip in Bottom Row (j=-1)
-                            rem_start = np.array([intersect_x, Y_MIN])
-                            rem_end   = rem_start + (end_p - intersect_p)
-                            
-                            ax.arrow(rem_start[0], rem_start[1], 
-                                     rem_end[0] - rem_start[0], rem_end[1] - rem_start[1],
-                                     head_width=0.03, head_length=0.04,
-                                     fc='black', ec='black', alpha=alpha, zorder=zorder,
-                                     length_includes_head=True)
-                            
-                            # 3. Draw Ghost at the wrapped position
-                            # ghost_circle = patches.Circle(rem_end, 0.06, 
-                            #           facecolor='none', edgecolor=colors[0], 
-                            #           linestyle=':', linewidth=2, zorder=12)
-                            # ax.add_patch(ghost_circle)
-
-                if draw_standard:
-                    ax.arrow(p[0], p[1], v[0], v[1], 
-                             head_width=0.03, head_length=0.04, 
-                             fc='black', ec='black', 
-                             alpha=alpha, zorder=zorder, 
-                             length_includes_head=True)
+    # Draw Particles and Vectors: replicas (faded, zorder=5) then the central
+    # box (opaque, zorder=10), each as one circle collection and one quiver
+    is_center = ~shifts.any(axis=1)
+    draw_replicas(ax, pos, vel, colors, shifts[~is_center], super_box, super_origin,
+                  alpha=0.4, zorder=5)
+    draw_replicas(ax, pos, vel, colors, shifts[is_center], super_box, super_origin,
+                  alpha=1.0, zorder=10)
 
     # --------------------------
     # 3. Central Mechanism Annotation & Text
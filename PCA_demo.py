@@ -10,7 +10,8 @@ Created on Tue Jul 22 15:09:09 2025
 import numpy as np
 import matplotlib.pyplot as plt
 plt.rcParams['font.family'] = 'Times New Roman'
-from sklearn.decomposition import PCA
+from StreamingPCA import StreamingPCA
+from DensityPlot import DENSITY_THRESHOLD, density_scatter
 
 # Generate synthetic 2D data with some correlation
 np.random.seed(42)
@@ -19,15 +20,21 @@ cov = [[3, 2], [2, 2]]  # Covariance matrix with correlation
 x, y = np.random.multivariate_normal(mean, cov, 400).T
 data = np.vstack((x, y)).T
 print(len(x))
-# Fit PCA
-pca = PCA(n_components=2)
-pca.fit(data)
+# Fit PCA in one pass over batches; the same call streams a .npy or .xyz
+# trajectory from disk, and pca.save() keeps the components for projecting
+# new frames
+pca = StreamingPCA(n_components=2)
+pca.fit(data, batch_size=100)
 components = pca.components_
 mean_point = pca.mean_
 
 # Recreate the plot with arrows at the end of the principal component lines
 fig, ax = plt.subplots(figsize=(10, 10))
-ax.scatter(data[:, 0], data[:, 1], s = 60, c = 'black', alpha=0.5, label='Original data')
+# Millions of projected frames are binned into one raster image instead
+if len(data) > DENSITY_THRESHOLD:
+    density_scatter(ax, data[:, 0], data[:, 1], color='black', alpha=0.5, label='Original data')
+else:
+    ax.scatter(data[:, 0], data[:, 1], s = 60, c = 'black', alpha=0.5, label='Original data')
 
 # Plot principal components as arrows
 pc_component = 1
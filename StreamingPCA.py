@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:47:15 2026
+
+@author: alfonsocabezonvizoso
+"""
+
+import argparse
+import collections
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+
+def iter_batches(source, batch_size : int = 1000):
+    '''
+    Stream a data set as 2D batches of flattened frames.
+
+    Parameters
+    ----------
+    source : str, np.ndarray or iterable
+        A '.npy' file (memory-mapped), a multi-frame '.xyz' file, an array
+        (frames along the first axis, e.g. a memmap) or an iterable that
+        already yields batches.
+    batch_size : int, optional
+        Frames per batch for files and arrays. The default is 1000.
+
+    Yields
+    ------
+    np.ndarray
+        Batches with shape (n_batch, n_features).
+
+    '''
+    if isinstance(source, str):
+        if source.endswith('.xyz'):
+            from XYZTrajectory import XYZTrajectory
+            with XYZTrajectory(source) as traj:
+                for batch in traj.iter_batches(batch_size):
+                    yield batch.reshape(len(batch), -1)
+            return
+        source = np.load(source, mmap_mode='r')
+    if isinstance(source, np.ndarray):
+        for first in range(0, len(source), batch_size):
+            batch = np.asarray(source[first:first + batch_size])
+            yield batch.reshape(len(batch), -1)
+        return
+    for batch in source:
+        batch = np.asarray(batch)
+        yield batch.reshape(len(batch), -1)
+
+
+def map_batches(func, batches, n_jobs : int, *args):
+    '''
+    ``func(batch, *args)`` for every batch, in order. With n_jobs > 1 the
+    batches go to a process pool with at most a few batches per worker in
+    flight, so memory stays bounded.
+    '''
+    if n_jobs == 1:
+        for batch in batches:
+            yield func(batch, *args)
+        return
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        pending = collections.deque()
+        for batch in batches:
+            pending.append(pool.submit(func, batch, *args))
+            if len(pending) >= 2 * n_jobs:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def batch_stats(batch, dtype=np.float64):
+    '''
+    Frame count, mean and scatter matrix of one batch, the summary that
+    ``StreamingPCA.merge`` folds into a model. Worker processes can compute
+    it and send back only (n_features, n_features) values.
+    '''
+    batch = np.asarray(batch, dtype=dtype)
+    batch = batch.reshape(len(batch), -1)
+    mean = batch.mean(axis=0)
+    centered = batch - mean
+    return len(batch), mean, centered.T @ centered
+
+
+class StreamingPCA:
+    '''
+    PCA fitted in one pass over batches of frames.
+
+    Every batch updates the running mean and the scatter matrix (sum of
+    outer products of the centered frames) with the pairwise update of Chan
+    et al., so memory is set by the batch size and the number of features,
+    not by the number of frames. The components are the eigenvectors of the
+    covariance. Attribute names follow sklearn.decomposition.PCA, and the
+    sign of every component is chosen like sklearn, largest entry positive.
+
+    Parameters
+    ----------
+    n_components : int, optional
+        Number of components kept. The default is all of them.
+    dtype : np.dtype, optional
+        Accumulation precision. np.float32 halves the memory of the
+        (n_features, n_features) scatter matrix. The default is np.float64.
+
+    '''
+
+    def __init__(self, n_components : int = None, dtype=np.float64):
+        self.n_components = n_components
+        self.dtype = np.dtype(dtype)
+        self.n_samples_seen_ = 0
+        self.mean_ = None
+        self._scatter = None
+
+    def partial_fit(self, batch):
+        '''
+        Add a batch of frames, shape (n_batch, n_features), and refresh the
+        components.
+        '''
+        self._update(batch)
+        self.finalize()
+        return self
+
+    def _update(self, batch):
+        if len(batch):
+            self.merge(*batch_stats(batch, self.dtype))
+
+    def merge(self, n_b : int, mean_b, scatter_b):
+        '''
+        Fold the statistics of a batch (see ``batch_stats``) into the running
+        mean and scatter matrix. Call ``finalize`` afterwards to refresh the
+        components.
+        '''
+        mean_b = np.asarray(mean_b, dtype=self.dtype)
+        scatter_b = np.asarray(scatter_b, dtype=self.dtype)
+        if self.mean_ is None:
+            self.mean_ = mean_b.copy()
+            self._scatter = scatter_b.copy()
+            self.n_samples_seen_ = n_b
+            return
+        if len(mean_b) != len(self.mean_):
+            raise ValueError(f'Batch has {len(mean_b)} features, expected {len(self.mean_)}')
+        n_a = self.n_samples_seen_
+        n = n_a + n_b
+        delta = mean_b - self.mean_
+        self._scatter += scatter_b
+        self._scatter += np.outer(delta, delta) * (n_a * n_b / n)
+        self.mean_ += delta * (n_b / n)
+        self.n_samples_seen_ = n
+
+    def finalize(self):
+        '''
+        Diagonalize the covariance accumulated so far.
+        '''
+        if self.n_samples_seen_ < 2:
+            raise ValueError('At least two frames are needed to fit a PCA')
+        covariance = self._scatter / (self.n_samples_seen_ - 1)
+        self.feature_variance_ = np.diag(covariance).copy()
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        order = np.argsort(eigenvalues)[::-1][:self.n_components]
+        components = eigenvectors[:, order].T
+        signs = np.sign(components[np.arange(len(components)),
+                                   np.abs(components).argmax(axis=1)])
+        self.components_ = components * signs[:, None]
+        # Round-off can leave tiny negative eigenvalues
+        self.explained_variance_ = np.clip(eigenvalues[order], 0, None)
+        self.explained_variance_ratio_ = self.explained_variance_ / max(
+            np.clip(eigenvalues, 0, None).sum(), np.finfo(float).tiny)
+
+    def fit(self, source, batch_size : int = 1000):
+        '''
+        Fit on every batch of ``source`` (see ``iter_batches``) in one pass.
+        '''
+        for batch in iter_batches(source, batch_size):
+            self._update(batch)
+        self.finalize()
+        return self
+
+    def transform(self, X):
+        '''
+        Project frames, shape (n_frames, ...) with n_features values per
+        frame, on the components.
+        '''
+        X = np.asarray(X)
+        X = X.reshape(len(X), -1)
+        return (X - self.mean_) @ self.components_.T
+
+    def iter_transform(self, source, batch_size : int = 1000):
+        '''
+        Project a data set batch by batch, yielding (n_batch, n_components)
+        arrays.
+        '''
+        for batch in iter_batches(source, batch_size):
+            yield self.transform(batch)
+
+    def inverse_transform(self, Y):
+        '''
+        Frames, flattened, corresponding to the projections ``Y``.
+        '''
+        return np.asarray(Y) @ self.components_ + self.mean_
+
+    def save(self, path : str, scatter : bool = False):
+        '''
+        Write the fitted model to an ``.npz`` file, replaced atomically. With
+        ``scatter`` the accumulated scatter matrix is stored too, so fitting
+        can continue with ``partial_fit`` after ``load``.
+        '''
+        tmp = f'{path}.tmp.npz'
+        extra = {'scatter': self._scatter} if scatter else {}
+        np.savez(tmp, mean=self.mean_, components=self.components_,
+                 explained_variance=self.explained_variance_,
+                 feature_variance=self.feature_variance_,
+                 explained_variance_ratio=self.explained_variance_ratio_,
+                 n_samples_seen=self.n_samples_seen_,
+                 n_components=-1 if self.n_components is None else self.n_components,
+                 dtype=self.dtype.str, **extra)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path : str):
+        '''
+        Restore a model written by ``save``; it can project frames right away.
+        '''
+        with np.load(path) as data:
+            n_components = int(data['n_components'])
+            pca = cls(None if n_components < 0 else n_components, dtype=str(data['dtype']))
+            pca.mean_ = data['mean']
+            pca.components_ = data['components']
+            pca.explained_variance_ = data['explained_variance']
+            pca.feature_variance_ = data['feature_variance']
+            pca.explained_variance_ratio_ = data['explained_variance_ratio']
+            pca.n_samples_seen_ = int(data['n_samples_seen'])
+            if 'scatter' in data.files:
+                pca._scatter = data['scatter']
+        return pca
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='One-pass PCA of large trajectories')
+    parser.add_argument('-i', '--input', help='Frames to fit (.npy or multi-frame .xyz)',
+                        action='store', type = str, required=True)
+    parser.add_argument('-m', '--model', help='Fitted model (.npz). If it exists, frames are only projected',
+                        action='store', type = str, default='pca.npz')
+    parser.add_argument('-o', '--output', help='Projections (.npy)',
+                        action='store', type = str, default='projections.npy')
+    parser.add_argument('-n', '--n_components', help='Number of components',
+                        action='store', type = int, default=10)
+    parser.add_argument('-b', '--batch_size', help='Frames per batch',
+                        action='store', type = int, default=1000)
+    parser.add_argument('--float32', help='Accumulate in single precision',
+                        action='store_true')
+    args = parser.parse_args()
+
+    if os.path.exists(args.model):
+        pca = StreamingPCA.load(args.model)
+    else:
+        pca = StreamingPCA(args.n_components, dtype=np.float32 if args.float32 else np.float64)
+        pca.fit(args.input, batch_size=args.batch_size)
+        pca.save(args.model)
+    projections = np.concatenate(list(pca.iter_transform(args.input, args.batch_size)))
+    np.save(args.output, projections)
+    print(f'Explained variance ratio: {np.round(pca.explained_variance_ratio_, 4)}')
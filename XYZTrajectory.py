@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:02:36 2026
+
+@author: alfonsocabezonvizoso
+"""
+
+import mmap
+import os
+import numpy as np
+
+
+def format_xyz(coords, elements, comments=None):
+    '''
+    Format one or several frames as XYZ text.
+
+    Parameters
+    ----------
+    coords : np.ndarray
+        Coordinates, shape (n_atoms, 3) or (n_frames, n_atoms, 3).
+    elements : sequence of str
+        Element symbol of every atom.
+    comments : str or sequence of str, optional
+        Comment line of every frame. The default is empty comments.
+
+    Returns
+    -------
+    bytes
+        XYZ text of all frames.
+
+    '''
+    coords = np.asarray(coords, dtype=float)
+    if coords.ndim == 2:
+        coords = coords[None]
+    n_frames, n_atoms, _ = coords.shape
+    if len(elements) != n_atoms:
+        raise ValueError(f'{len(elements)} elements for {n_atoms} atoms')
+    if comments is None or isinstance(comments, str):
+        comments = [comments or ''] * n_frames
+    atom_fmt = '\n'.join(f'{e:<2s} %14.6f %14.6f %14.6f' for e in elements)
+    frames = [f'{n_atoms}\n{comment}\n' + atom_fmt % tuple(frame.ravel()) + '\n'
+              for comment, frame in zip(comments, coords)]
+    return ''.join(frames).encode()
+
+
+def write_xyz(path : str, coords, elements, comments=None, mode : str = 'w'):
+    '''
+    Write one or several frames to an XYZ file with a single write call.
+    ``mode='a'`` appends; use ``XYZTrajectory.append`` to keep an index in
+    sync.
+    '''
+    with open(path, mode + 'b') as handle:
+        handle.write(format_xyz(coords, elements, comments))
+
+
+class XYZTrajectory:
+    '''
+    Random-access reader and appender for multi-frame XYZ files.
+
+    On first open the byte offset of every frame is found by scanning the
+    memory-mapped file with NumPy (one vectorized newline search per frame)
+    and stored next to the file as ``<path>.idx.npy``. Later opens reuse
+    that index and only scan frames appended since. Reading frame k then
+    parses just that frame's bytes.
+
+    Parameters
+    ----------
+    path : str
+        Path to the XYZ file. It is created if it does not exist.
+
+    '''
+
+    def __init__(self, path : str):
+        self.path = path
+        self.index_path = f'{path}.idx.npy'
+        if not os.path.exists(path):
+            open(path, 'wb').close()
+        self._mm = None
+        self._map()
+        # offsets[k] is the first byte of frame k, offsets[-1] the end of the last frame
+        self.offsets = self._load_index()
+        if self.offsets[-1] < self._size:
+            self._extend_index()
+
+    # ------------------------------------------------------------------ index
+    def _map(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._size = os.path.getsize(self.path)
+        self._mm = None
+        if self._size > 0:
+            with open(self.path, 'rb') as handle:
+                self._mm = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _load_index(self):
+        if (os.path.exists(self.index_path)
+                and os.path.getmtime(self.index_path) >= os.path.getmtime(self.path)):
+            offsets = np.load(self.index_path)
+            if len(offsets) and offsets[-1] <= self._size:
+                return offsets
+        return np.zeros(1, dtype=np.int64)
+
+    def _extend_index(self):
+        mm, size = self._mm, self._size
+        new = []
+        pos = int(self.offsets[-1])
+        guess = 4096
+        while pos < size:
+            header_end = mm.find(b'\n', pos)
+            if header_end < 0:
+                break
+            header = mm[pos:header_end]
+            if not header.strip():
+                # Blank lines, which many writers append after the last frame,
+                # join the preceding frame so frames added later are still found
+                pos = header_end + 1
+                if new:
+                    new[-1] = pos
+                else:
+                    self.offsets[-1] = pos
+                continue
+            n_atoms = int(header)
+            # The frame ends after n_atoms + 1 more newlines
+            body = header_end + 1
+            while True:
+                count = min(guess, size - body)
+                view = np.frombuffer(mm, dtype=np.uint8, count=count, offset=body)
+                newlines = np.flatnonzero(view == 10)
+                if len(newlines) > n_atoms:
+                    end = body + int(newlines[n_atoms]) + 1
+                    break
+                if body + count >= size:
+                    # Last frame without a trailing newline, or a truncated one
+                    end = size if len(newlines) == n_atoms else -1
+                    break
+                guess *= 2
+            if end < 0:
+                break
+            guess = max(4096, int(1.5 * (end - pos)))
+            new.append(end)
+            pos = end
+        if new:
+            self.offsets = np.concatenate([self.offsets, np.array(new, dtype=np.int64)])
+        self._save_index()
+
+    def _save_index(self):
+        tmp = f'{self.index_path}.tmp.npy'
+        np.save(tmp, self.offsets)
+        os.replace(tmp, self.index_path)
+
+    # ----------------------------------------------------------------- access
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def _frame_bytes(self, k : int):
+        if k < 0:
+            k += len(self)
+        if not 0 <= k < len(self):
+            raise IndexError(f'Frame {k} out of range for {len(self)} frames')
+        return self._mm[self.offsets[k]:self.offsets[k + 1]]
+
+    def _parse(self, k : int):
+        header, comment, body = self._frame_bytes(k).split(b'\n', 2)
+        n_atoms = int(header)
+        tokens = body.split()
+        tokens = np.array(tokens, dtype=object).reshape(n_atoms, -1)
+        return tokens, comment.decode().rstrip('\r')
+
+    def __getitem__(self, k : int):
+        '''
+        Coordinates of frame ``k`` as an (n_atoms, 3) float array.
+        '''
+        tokens, _ = self._parse(k)
+        return tokens[:, 1:4].astype(float)
+
+    def elements(self, k : int = 0):
+        '''
+        Element symbols of frame ``k``.
+        '''
+        tokens, _ = self._parse(k)
+        return [e.decode() for e in tokens[:, 0]]
+
+    def comment(self, k : int):
+        '''
+        Comment line of frame ``k``.
+        '''
+        return self._parse(k)[1]
+
+    def iter_batches(self, batch_size : int = 100, start : int = 0, stop : int = None):
+        '''
+        Stream frames in batches of at most ``batch_size``.
+
+        Yields
+        ------
+        np.ndarray
+            Coordinates with shape (n_batch, n_atoms, 3). All frames of a
+            batch must have the same number of atoms.
+
+        '''
+        stop = len(self) if stop is None else min(stop, len(self))
+        for first in range(start, stop, batch_size):
+            last = min(first + batch_size, stop)
+            yield np.stack([self[k] for k in range(first, last)])
+
+    def append(self, coords, elements, comments=None):
+        '''
+        Append one (n_atoms, 3) frame or a (n_frames, n_atoms, 3) block of
+        frames with a single write and extend the index accordingly.
+        '''
+        data = format_xyz(coords, elements, comments)
+        with open(self.path, 'ab') as handle:
+            handle.write(data)
+        self._map()
+        self._extend_index()
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()